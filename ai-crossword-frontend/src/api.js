@@ -15,3 +15,45 @@ export async function generateCrossword(words, theme = "") {
   }
 }
 
+
+// Streaming variant of generateCrossword (POST /generate/stream, Server-Sent Events).
+// onLayout is called with every improved puzzle while the search runs, onWords once
+// the word list is known; resolves with the final puzzle.
+export async function streamCrossword(words, theme = "", { onWords, onLayout } = {}) {
+  const res = await fetch(`${API_BASE}/generate/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ words, theme })
+  });
+  if (!res.ok) {
+    throw new Error(`API Error: ${res.status}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let end;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const event = block.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] ?? "null");
+
+      if (event === "words" && onWords) onWords(data);
+      else if (event === "layout" && onLayout) onLayout(data);
+      else if (event === "done") result = data;
+      else if (event === "error") throw new Error(data.detail);
+    }
+  }
+  if (result === null) {
+    throw new Error("API Error: stream ended without a puzzle");
+  }
+  return result;
+}
@@ -1,38 +1,81 @@
 # backend/ai_word_generator.py
-from openai import OpenAI
-import json
-client = OpenAI()
-
-def get_words_by_theme(theme, num_words=10, test=0):
-   if test :
-        result = {
-            "ZON" : {"word":"ZON","clue":"De ster in ons zonnestelsel."},
-            "STRAND" : {"word":"STRAND","clue":"Plaats waar je zand en zee vindt."},
-            "VAKANTIE" : {"word":"VAKANTIE","clue":"Tijd om te ontspannen en te reizen."}
-        }
-        words = list(result.keys())
-        return words, result
-   else :
-    prompt = f"In order to help me build a crossword puzzle, generate {num_words} simple Dutch words related to the theme '{theme}'. Return only a plain json array (no line breaks, nothing besides the values asked) with words and a short clue (in Dutch) for them, the keys used in each object should be 'word' and 'clue'."
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
-    )
-    #print(response.choices[0].message.content.strip())
-    json_string = response.choices[0].message.content.strip()
-    print(json_string)
-    json_result = json.loads(json_string)
-    result = {
-        item["word"].upper(): {
-            "clue": item["clue"],
-            "word": item["word"].upper()
-        }
-        for item in json_result
-    }
-
-    # print(result)
-
-    words = list(result.keys())
-    return words, result
\ No newline at end of file
+import asyncio
+import copy
+import os
+from word_cache import WordCache, normalize_theme
+from word_providers import get_provider
+
+# Theme -> words/clues cache in front of the LLM. WORD_CACHE_PATH="" keeps it in memory only.
+word_cache = WordCache(
+    path=os.getenv("WORD_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "word_cache.sqlite3")) or None,
+    ttl=float(os.getenv("WORD_CACHE_TTL", 7 * 24 * 3600)),
+    variants=int(os.getenv("WORD_CACHE_VARIANTS", "3")),
+)
+
+# In-flight provider calls keyed by request, shared by concurrent callers (single-flight).
+_inflight = {}
+
+
+def _provider(test):
+    return get_provider("fixture" if test else None)
+
+
+def get_words_by_theme(theme, num_words=10, test=0, language="nl"):
+    """
+    Words and clues for a theme from the configured word provider (WORD_PROVIDER,
+    see word_providers.py), or from the fixture provider when `test` is set.
+
+    Returns:
+        words (list[str]), result (dict)
+    """
+    return _provider(test).get_words(theme, num_words, language)
+
+
+def _theme_key(theme, num_words, provider, language):
+    return (normalize_theme(theme), num_words, provider.name, language)
+
+
+async def _fetch_and_cache(provider, theme, num_words, language):
+    words, result = await provider.get_words_async(theme, num_words, language)
+    if provider.cacheable:
+        # the SQLite write blocks, so it runs on a thread
+        await asyncio.get_running_loop().run_in_executor(
+            None, word_cache.put, theme, num_words, language, words, result
+        )
+    return words, result
+
+
+async def get_words_by_theme_async(theme, num_words=10, test=0, language="nl"):
+    """
+    Non-blocking variant of get_words_by_theme.
+
+    Answers from an LLM provider go through word_cache first (its SQLite reads
+    and writes run on a thread). On a miss the provider fetches without blocking
+    the event loop (micro-batched, or on a bounded thread pool). Concurrent requests for the same theme share one
+    in-flight call; every caller gets its own copy of the result so it can
+    annotate the clues freely.
+
+    Returns:
+        words (list[str]), result (dict)
+    """
+    provider = _provider(test)
+    if provider.cacheable:
+        cached = await asyncio.get_running_loop().run_in_executor(None, word_cache.get, theme, num_words, language)
+        if cached is not None:
+            return cached
+
+    key = _theme_key(theme, num_words, provider, language)
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_fetch_and_cache(provider, theme, num_words, language))
+        _inflight[key] = future
+
+        def _forget(done, key=key):
+            if _inflight.get(key) is done:
+                del _inflight[key]
+
+        future.add_done_callback(_forget)
+
+    # shield: a cancelled caller must not cancel the call the others are waiting on
+    words, result = await asyncio.shield(future)
+    return list(words), copy.deepcopy(result)
@@ -0,0 +1,216 @@
+"""
+Layout benchmark for the four placement engines.
+
+Runs every engine on fixed Dutch word lists (5/10/20/50 words) and several grid
+sizes, seeded so runs are reproducible, and reports wall time, peak memory,
+placed-word ratio, crossings, grid density and layout validity (validator.check_layout)
+as JSON. It also checks that the built-in csp templates fill with the lexicon.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json      # exit code 1 on regressions
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import crossword_csp
+import crossword_generator
+import crossword_generator_greedy
+import crossword_generator_new
+import crossword_generator_v1
+from validator import check_layout
+
+# Fixed corpus; the list of size n is its first n words. Nothing is longer than
+# the smallest grid, because the engines centre the first word without a bounds check.
+CORPUS = [
+    "VAKANTIE", "STRAND", "ZON", "ZEE", "SCHELP", "ZWEMMEN", "HANDDOEK", "PARASOL", "DUIN", "MEEUW",
+    "ZOMER", "BOOT", "KREEFT", "IJSJE", "ZAND", "GOLF", "WOLK", "REGEN", "WIND", "LUCHT",
+    "BOOM", "BLOEM", "TUIN", "HUIS", "DEUR", "RAAM", "TAFEL", "STOEL", "BOEK", "SCHOOL",
+    "FIETS", "TREIN", "AUTO", "STRAAT", "STAD", "DORP", "KAAS", "BROOD", "MELK", "APPEL",
+    "PEER", "KOFFIE", "THEE", "SOEP", "KAT", "HOND", "VOGEL", "PAARD", "KONIJN", "SCHAAP",
+]
+
+WORD_COUNTS = [5, 10, 20, 50]
+GRID_SIZES = [9, 15, 25]
+ENGINES = ["v1", "greedy", "new", "backtrack"]
+# Search nodes a built-in csp template may take to fill
+TEMPLATE_NODE_BUDGET = 20000
+
+
+def run_engine(engine, words, grid_size, node_budget, seed, time_budget_ms=None):
+    """
+    Run one engine, discarding what it prints.
+
+    The backtracking engine stops after node_budget search nodes, so its result
+    depends only on the seed; a time budget would make it depend on machine load.
+
+    Returns:
+        grid (Grid), placed (list[tuple]) as (word, row, col, direction)
+    """
+    if engine == "v1":
+        with contextlib.redirect_stdout(io.StringIO()):
+            return crossword_generator_v1.create_crossword(words, grid_size=grid_size, seed=seed)
+    if engine == "greedy":
+        grid, placed = crossword_generator_greedy.create_crossword(words, grid_size=grid_size, seed=seed)
+        return grid, [(p["word"], p["row"], p["col"], p["dir"]) for p in placed]
+    if engine == "new":
+        return crossword_generator_new.create_crossword(words, {}, grid_size=grid_size, seed=seed)
+    if engine == "backtrack":
+        return crossword_generator.create_crossword(
+            words, {}, grid_size=grid_size, node_budget=node_budget, time_budget_ms=time_budget_ms, seed=seed
+        )
+    raise ValueError(f"unknown engine {engine!r}")
+
+
+def measure(engine, words, grid_size, seed, repeat, node_budget, time_budget_ms=None):
+    """Median wall time over `repeat` seeded runs plus one traced run for peak memory."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        grid, placed = run_engine(engine, words, grid_size, node_budget, seed, time_budget_ms)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run_engine(engine, words, grid_size, node_budget, seed, time_budget_ms)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    quality = check_layout(grid, placed)
+    return {
+        "engine": engine,
+        "words": len(words),
+        "grid_size": grid_size,
+        "time_ms": round(statistics.median(times) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+        "placed_ratio": round(len(placed) / len(words), 4),
+        "crossings": quality["crossings"],
+        "density": quality["density"],
+        "valid": quality["valid"],
+    }
+
+
+def check_templates(seed=1234):
+    """
+    Fill every built-in csp template with the lexicon (CROSSWORD_LEXICON or the
+    bundled list) and the benchmark's theme words.
+
+    Returns:
+        dict: template size (str) -> True if it filled within TEMPLATE_NODE_BUDGET nodes
+    """
+    return {
+        str(size): crossword_csp.create_crossword(
+            CORPUS, {}, template=template, seed=seed, node_budget=TEMPLATE_NODE_BUDGET
+        )[0] is not None
+        for size, template in sorted(crossword_csp.TEMPLATES.items())
+    }
+
+
+def run(engines, word_counts, grid_sizes, seed=1234, repeat=3, node_budget=1500, time_budget_ms=None):
+    results = []
+    for engine in engines:
+        for n in word_counts:
+            for grid_size in grid_sizes:
+                results.append(measure(engine, CORPUS[:n], grid_size, seed, repeat, node_budget, time_budget_ms))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "seed": seed,
+            "repeat": repeat,
+            "node_budget": node_budget,
+            "time_budget_ms": time_budget_ms,
+        },
+        "results": results,
+        "templates": check_templates(seed),
+    }
+
+
+def _key(result):
+    return result["engine"], result["words"], result["grid_size"]
+
+
+def compare(report, baseline, time_tolerance=0.25, min_time_ms=1.0):
+    """
+    Compare a report against a saved baseline.
+
+    Timing counts as a regression when it is more than time_tolerance slower and
+    the difference exceeds min_time_ms (sub-millisecond runs are mostly noise).
+    Quality (placed ratio, crossings, validity) must not drop at all, since runs are
+    seeded. The exception is the backtracking engine when either report was run
+    with a time budget: how far it gets then depends on the machine, so only its
+    timing is compared.
+
+    A built-in csp template that filled in the baseline must still fill.
+
+    Returns:
+        list[str]: One line per regression
+    """
+    previous = {_key(r): r for r in baseline["results"]}
+    time_bounded = bool(report["meta"].get("time_budget_ms") or baseline["meta"].get("time_budget_ms"))
+    regressions = []
+    for result in report["results"]:
+        base = previous.get(_key(result))
+        if base is None:
+            continue
+        label = "{} words={} grid={}".format(*_key(result))
+        if (result["time_ms"] > base["time_ms"] * (1 + time_tolerance)
+                and result["time_ms"] - base["time_ms"] > min_time_ms):
+            regressions.append(f"{label}: time {base['time_ms']}ms -> {result['time_ms']}ms")
+        if time_bounded and result["engine"] == "backtrack":
+            continue
+        if result["placed_ratio"] < base["placed_ratio"]:
+            regressions.append(f"{label}: placed ratio {base['placed_ratio']} -> {result['placed_ratio']}")
+        if result["crossings"] < base["crossings"]:
+            regressions.append(f"{label}: crossings {base['crossings']} -> {result['crossings']}")
+        if base.get("valid", True) and not result["valid"]:
+            regressions.append(f"{label}: layout no longer valid")
+    for size, filled in baseline.get("templates", {}).items():
+        if filled and not report.get("templates", {}).get(size):
+            regressions.append(f"csp template {size}: no longer fills")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--words", nargs="+", type=int, default=WORD_COUNTS, help="word list sizes (max 50)")
+    parser.add_argument("--grids", nargs="+", type=int, default=GRID_SIZES, help="grid sizes (9-101)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--node-budget", type=int, default=1500, help="search nodes for the backtracking engine")
+    parser.add_argument("--time-budget-ms", type=int, default=None,
+                        help="also stop the backtracking engine after this long (its quality is then not compared)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="saved report to compare against")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    report = run(args.engines, [min(n, len(CORPUS)) for n in args.words], args.grids,
+                 seed=args.seed, repeat=args.repeat, node_budget=args.node_budget,
+                 time_budget_ms=args.time_budget_ms)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if not any(report["templates"].values()):
+        print("ERROR no built-in csp template fills with the lexicon", file=sys.stderr)
+        return 1
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), time_tolerance=args.time_tolerance)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+import random
+import time
+
+from grid import Grid
+from lexicon import Lexicon, get_lexicon
+
+BLOCK = '#'
+
+# Block patterns ('#' = black square, '.' = open, a letter = pre-filled), keyed by size.
+# Open runs of two or more cells are the slots to fill. The built-in ones are made
+# for the bundled lexicon, which is mostly words of 3 to 5 letters: every slot has
+# 3 or 5 cells, and words run along the even rows and columns, so only every other
+# letter is crossed. Denser patterns need a larger CROSSWORD_LEXICON.
+TEMPLATES = {
+    9: [
+        ".....#...",
+        ".#.###.#.",
+        "...#.....",
+        ".###.#.##",
+        "...#.#...",
+        "##.#.###.",
+        ".....#...",
+        ".#.###.#.",
+        "...#.....",
+    ],
+    15: [
+        "...#.#.....#...",
+        "##.#.#.#.#.#.#.",
+        "...#...#.....#.",
+        ".###.#####.####",
+        "...#...#.....#.",
+        "##.###.#.###.#.",
+        "...#...#...#...",
+        ".###.#####.###.",
+        "...#...#...#...",
+        ".#.###.#.###.##",
+        ".#.....#...#...",
+        "####.#####.###.",
+        ".#.....#...#...",
+        ".#.#.#.#.#.#.##",
+        "...#.....#.#...",
+    ],
+}
+
+
+def template_for(size):
+    """The largest built-in template that fits a size x size grid."""
+    fitting = [s for s in TEMPLATES if s <= size]
+    return TEMPLATES[max(fitting) if fitting else min(TEMPLATES)]
+
+
+def _popcount(bits):
+    return bin(bits).count("1")
+
+
+class TemplateFiller:
+    """
+    Constraint-propagation filler for a dense block-pattern grid.
+
+    Every slot (open run of two or more cells) is a variable; its domain is a bitset
+    over the lexicon words of its length, with theme words ordered before the rest.
+    The search picks the slot with the fewest remaining words (MRV, ties broken by
+    the number of open crossing slots), tries its words and forward-checks every
+    crossing slot by ANDing its domain with the bitset for the shared letter. An
+    empty domain undoes the choice straight away.
+    """
+
+    def __init__(self, template, lexicon, theme_words=(), seed=None, rng=None, time_budget_ms=None, node_budget=None):
+        """
+        Args:
+            template (list[str]): Rows of '#', '.' and pre-filled letters
+            lexicon (Lexicon): Word list for the slots
+            theme_words (iterable[str]): Words to prefer over the lexicon
+            seed (int | None): Seed for the value order
+            rng (random.Random | None): Explicit RNG, takes precedence over seed
+            time_budget_ms (int | None): Give up after this long
+            node_budget (int | None): Give up after this many search nodes
+        """
+        self.template = [row.upper() for row in template]
+        self.rows = len(self.template)
+        self.cols = max((len(row) for row in self.template), default=0)
+        self.lexicon = lexicon
+        self.theme = Lexicon(theme_words)
+        self.rng = rng or random.Random(seed)
+        self.time_budget_ms = time_budget_ms
+        self.node_budget = node_budget
+        self.deadline = None
+        self.timed_out = False
+        self.stats = {"nodes": 0, "candidates": 0, "fallbacks": 0}
+        self._masks = {}
+
+        self.slots = []  # (row, col, direction, length)
+        self._find_slots()
+        self.neighbours = self._find_crossings()
+        self.domains = [self._initial_domain(slot) for slot in self.slots]
+        self.assigned = [None] * len(self.slots)
+        self.used = set()
+        # Where the lexicon part of each length's value order starts, so seeds vary the fill
+        self._offsets = {}
+
+    def _cell(self, r, c):
+        row = self.template[r]
+        return row[c] if c < len(row) else BLOCK
+
+    def _find_slots(self):
+        for direction, (outer, inner) in (("H", (self.rows, self.cols)), ("V", (self.cols, self.rows))):
+            for a in range(outer):
+                run = 0
+                for b in range(inner + 1):
+                    r, c = (a, b) if direction == "H" else (b, a)
+                    open_cell = b < inner and self._cell(r, c) != BLOCK
+                    if open_cell:
+                        run += 1
+                        continue
+                    if run >= 2:
+                        start = b - run
+                        self.slots.append((a, start, "H", run) if direction == "H" else (start, a, "V", run))
+                    run = 0
+
+    def _cells(self, slot):
+        row, col, direction, length = slot
+        return [(row + i, col) if direction == "V" else (row, col + i) for i in range(length)]
+
+    def _find_crossings(self):
+        """neighbours[s] = [(other slot, index in s, index in other)]."""
+        by_cell = {}
+        for sid, slot in enumerate(self.slots):
+            for i, cell in enumerate(self._cells(slot)):
+                by_cell.setdefault(cell, []).append((sid, i))
+        neighbours = [[] for _ in self.slots]
+        for entries in by_cell.values():
+            for sid, i in entries:
+                for other, j in entries:
+                    if other != sid:
+                        neighbours[sid].append((other, i, j))
+        return neighbours
+
+    def _theme_count(self, length):
+        return len(self.theme.by_length.get(length, ()))
+
+    def _mask(self, length, pos, letter):
+        """Domain bitset: theme words in the low bits, lexicon words above them."""
+        key = (length, pos, letter)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self.theme.mask(length, pos, letter) | (self.lexicon.mask(length, pos, letter) << self._theme_count(length))
+            self._masks[key] = mask
+        return mask
+
+    def _all(self, length):
+        return self.theme.all_mask(length) | (self.lexicon.all_mask(length) << self._theme_count(length))
+
+    def _word(self, length, index):
+        t = self._theme_count(length)
+        return self.theme.word(length, index) if index < t else self.lexicon.word(length, index - t)
+
+    def _initial_domain(self, slot):
+        length = slot[3]
+        domain = self._all(length)
+        for i, (r, c) in enumerate(self._cells(slot)):
+            ch = self._cell(r, c)
+            if ch != '.':
+                domain &= self._mask(length, i, ch)
+        return domain
+
+    def _values(self, sid):
+        """Word indices of a slot's domain: theme words first, then the lexicon from a seeded offset."""
+        length = self.slots[sid][3]
+        domain = self.domains[sid]
+        t = self._theme_count(length)
+        theme_bits = domain & ((1 << t) - 1)
+        rest = domain >> t
+        if length not in self._offsets:
+            self._offsets[length] = self.rng.randrange(max(1, len(self.lexicon.by_length.get(length, ()))))
+        offset = self._offsets[length]
+        high = rest >> offset << offset
+        for bits, shift in ((theme_bits, 0), (high, t), (rest ^ high, t)):
+            while bits:
+                low = bits & -bits
+                yield low.bit_length() - 1 + shift
+                bits ^= low
+
+    def _select(self):
+        """Unassigned slot with the smallest domain; ties go to the most open crossings."""
+        best = None
+        best_key = None
+        for sid, word in enumerate(self.assigned):
+            if word is not None:
+                continue
+            degree = sum(1 for other, _, _ in self.neighbours[sid] if self.assigned[other] is None)
+            key = (_popcount(self.domains[sid]), -degree)
+            if best_key is None or key < best_key:
+                best, best_key = sid, key
+        return best
+
+    def _assign(self, sid, word):
+        """
+        Assign and forward-check.
+
+        Returns:
+            ok (bool), trail (list) of (slot, previous domain) to undo
+        """
+        self.assigned[sid] = word
+        self.used.add(word)
+        trail = []
+        for other, i, j in self.neighbours[sid]:
+            if self.assigned[other] is not None:
+                continue
+            domain = self.domains[other] & self._mask(self.slots[other][3], j, word[i])
+            trail.append((other, self.domains[other]))
+            self.domains[other] = domain
+            if not domain:
+                return False, trail
+        return True, trail
+
+    def _unassign(self, sid, trail):
+        self.used.discard(self.assigned[sid])
+        self.assigned[sid] = None
+        for other, domain in reversed(trail):
+            self.domains[other] = domain
+
+    def _out_of_budget(self):
+        nodes = self.stats["nodes"]
+        if self.node_budget is not None and nodes >= self.node_budget:
+            return True
+        return self.deadline is not None and nodes % 64 == 0 and time.perf_counter() >= self.deadline
+
+    def _search(self):
+        self.stats["nodes"] += 1
+        if self._out_of_budget():
+            self.timed_out = True
+            return False
+        sid = self._select()
+        if sid is None:
+            return True
+        length = self.slots[sid][3]
+        for index in self._values(sid):
+            word = self._word(length, index)
+            if word in self.used:
+                continue
+            self.stats["candidates"] += 1
+            ok, trail = self._assign(sid, word)
+            if ok and self._search():
+                return True
+            self._unassign(sid, trail)
+            if self.timed_out:
+                return False
+        return False
+
+    def solve(self):
+        """
+        Fill the template.
+
+        Returns:
+            grid (Grid) or None if no fill was found in time,
+            placed (list[tuple]) as (word, row, col, direction)
+        """
+        if self.time_budget_ms is not None:
+            self.deadline = time.perf_counter() + self.time_budget_ms / 1000
+        if any(not domain for domain in self.domains) or not self._search():
+            return None, []
+
+        # every open cell is in a slot, so writing the words fills the grid; blocks stay empty
+        grid = Grid(self.rows, self.cols)
+        placed = []
+        for slot, word in zip(self.slots, self.assigned):
+            grid.write(word, slot[0], slot[1], slot[2])
+            placed.append((word, slot[0], slot[1], slot[2]))
+        return grid, placed
+
+
+def create_crossword(words, clues, grid_size=15, template=None, lexicon=None, seed=None, time_budget_ms=None,
+                     stats=None, node_budget=None):
+    """
+    Fill a block-pattern template, preferring the given (theme) words.
+
+    Args:
+        words (list[str]): Theme words to use where they fit
+        clues (dict): Dictionary of clues (lexicon words are looked up by the caller)
+        grid_size (int): Picks the built-in template when no template is given
+        template (list[str] | None): Rows of '#', '.' and letters
+        lexicon (Lexicon | None): Word list; defaults to the shared lexicon
+        seed (int | None): Seed for the value order
+        time_budget_ms (int | None): Give up after this long
+        stats (dict | None): Filled with the search counters when given
+        node_budget (int | None): Give up after this many search nodes
+
+    Returns:
+        grid (Grid) or None when the template could not be filled, positions (list[tuple])
+    """
+    filler = TemplateFiller(template or template_for(grid_size), lexicon or get_lexicon(), theme_words=words, seed=seed,
+                            time_budget_ms=time_budget_ms, node_budget=node_budget)
+    grid, positions = filler.solve()
+    if stats is not None:
+        stats.update(filler.stats)
+    return grid, positions
@@ -1,142 +1,252 @@
-import itertools,random
+import random,time
+
+from grid import Grid
+from validator import placement_is_clean
+
+# translate() tables for the per-cell word counts
+_INC = bytes((i + 1) & 0xFF for i in range(256))
+_DEC = bytes((i - 1) & 0xFF for i in range(256))
 
 class CrosswordSolver:
-    def __init__(self, words, clues, size=15):
-        self.words = [w.upper() for w in words]
+    def __init__(self, words, clues, size=15, time_budget_ms=None, node_budget=None, first_direction="H", max_words=None,
+                 seed=None, rng=None, on_improve=None):
+        # Candidate vocabulary; words are referred to by their index (id) in this list.
+        # Words longer than the grid can't be placed and are left out (callers report them unplaced)
+        self.pool = [w.upper() for w in words if len(w) <= size]
+        self.first_direction = first_direction
+        self.rng = rng or random.Random(seed)
         self.clues = clues
         self.size = size
-        self.grid = [[' ' for _ in range(size)] for _ in range(size)]
+        self.grid = Grid(size)
+        # Number of placed words covering each cell (same layout as grid.cells), so undo never rescans `placed`
+        self.counts = bytearray(size * size)
+        # Cells shared by two or more words, kept up to date by _place/_remove
+        self.score = 0
+        self.placed = []
         self.best_grid = None
         self.best_score = -1
         self.best_positions = []
 
+        # Anytime search: stop at the deadline / node budget and keep the best layout so far
+        self.time_budget_ms = time_budget_ms
+        self.node_budget = node_budget
+        self.deadline = None
+        self.timed_out = False
+        # Called as on_improve(grid, positions, score) whenever a better layout is found
+        self.on_improve = on_improve
+        # Work counters (search nodes, candidate placements checked, random fallbacks)
+        self.stats = {"nodes": 0, "candidates": 0, "fallbacks": 0}
+
         # Precompute all intersections
+        self.letter_index = self._build_letter_index()
         self.intersections = self._compute_intersections()
+        if max_words is not None and len(self.pool) > max_words:
+            self.order = self._select_words(max_words)
+        else:
+            self.order = list(range(len(self.pool)))
+        self.words = [self.pool[wid] for wid in self.order]
+        self.bounds = self._compute_bounds()
+
+    def _build_letter_index(self):
+        """Inverted index: letter -> [(word id, offset)] over the whole pool."""
+        index = {}
+        for wid, word in enumerate(self.pool):
+            for i, ch in enumerate(word):
+                index.setdefault(ch, []).append((wid, i))
+        return index
 
     def _compute_intersections(self):
-        """Find all letter overlaps between any two words."""
-        inter = {}
-        for w1, w2 in itertools.permutations(self.words, 2):
-            key = (w1, w2)
-            inter[key] = []
-            for i, c1 in enumerate(w1):
-                for j, c2 in enumerate(w2):
-                    if c1 == c2:
-                        inter[key].append((i, j))
+        """
+        Crossing graph of the pool: inter[a][b] lists the (i, j) with pool[a][i] == pool[b][j].
+
+        Built from the letter index, so the work is proportional to the number of
+        real overlaps and pairs of words without a common letter get no entry.
+        """
+        inter = [{} for _ in self.pool]
+        for wid, word in enumerate(self.pool):
+            crossings = inter[wid]
+            for i, ch in enumerate(word):
+                for other, j in self.letter_index[ch]:
+                    if other != wid:
+                        crossings.setdefault(other, []).append((i, j))
         return inter
 
+    def _select_words(self, max_words):
+        """
+        Choose up to max_words ids from the pool, best connected first.
+
+        Starts from the word that can cross the most other words, then keeps adding
+        the word with the most crossing partners among those already chosen (ties:
+        overall connectivity, then length). The result is also the search order,
+        so every word after the first has something to cross when its turn comes.
+        """
+        degree = [len(crossings) for crossings in self.intersections]
+        first = max(range(len(self.pool)), key=lambda w: (degree[w], len(self.pool[w]), -w))
+        chosen = [first]
+        links = [0] * len(self.pool)  # crossing partners among the chosen words
+        available = set(range(len(self.pool))) - {first}
+        while len(chosen) < max_words and available:
+            for other in self.intersections[chosen[-1]]:
+                links[other] += 1
+            nxt = max(available, key=lambda w: (links[w], degree[w], len(self.pool[w]), -w))
+            available.remove(nxt)
+            chosen.append(nxt)
+        return chosen
+
+    def _compute_bounds(self):
+        """
+        Optimistic crossing bound for every suffix of the search order.
+
+        A crossing is credited to the word placed second, and a word can only cross
+        on letters that occur in some other word, so bounds[k] (the sum of those
+        counts over words[k:]) is the most the remaining words can add to the score.
+        """
+        selected = set(self.order)
+        bounds = [0] * (len(self.order) + 1)
+        for k in range(len(self.order) - 1, -1, -1):
+            shareable = set()
+            for other, pairs in self.intersections[self.order[k]].items():
+                if other in selected:
+                    shareable.update(i for i, _ in pairs)
+            bounds[k] = bounds[k + 1] + len(shareable)
+        return bounds
+
+    def _out_of_budget(self):
+        nodes = self.stats["nodes"]
+        if self.node_budget is not None and nodes >= self.node_budget:
+            return True
+        # reading the clock every node is wasteful; every 256 nodes is plenty
+        if self.deadline is not None and nodes % 256 == 0 and time.perf_counter() >= self.deadline:
+            return True
+        return self.timed_out
+
     def _can_place(self, word, row, col, direction):
-        """Validate a word placement."""
-        n = len(word)
-        for i, ch in enumerate(word):
-            r = row + (i if direction == "V" else 0)
-            c = col + (i if direction == "H" else 0)
-            if not (0 <= r < self.size and 0 <= c < self.size):
-                return False
-            cur = self.grid[r][c]
-            if cur != ' ' and cur != ch:
-                return False
-        return True
+        """Validate a word placement (in bounds, no clashes, not touching other words)."""
+        return placement_is_clean(self.grid, word, row, col, direction)
 
     def _place(self, word, row, col, direction):
         """Place word on grid."""
-        for i, ch in enumerate(word):
-            r = row + (i if direction == "V" else 0)
-            c = col + (i if direction == "H" else 0)
-            self.grid[r][c] = ch
+        span = self.grid.span(row, col, direction, len(word))
+        counts = self.counts[span]
+        # cells covered once so far become shared
+        self.score += counts.count(1)
+        self.counts[span] = counts.translate(_INC)
+        self.grid.write(word, row, col, direction)
+
+    def _gain(self, word, row, col, direction):
+        """Crossings a (valid) placement would add to the score."""
+        return self.counts[self.grid.span(row, col, direction, len(word))].count(1)
 
     def _remove(self, word, row, col, direction):
         """Remove word from grid (for backtracking)."""
-        for i, ch in enumerate(word):
-            r = row + (i if direction == "V" else 0)
-            c = col + (i if direction == "H" else 0)
-            # Recompute cell if another word overlaps here
-            self.grid[r][c] = ' '
-            for w, rr, cc, d in self.placed:
-                for k, ch2 in enumerate(w):
-                    rr2 = rr + (k if d == "V" else 0)
-                    cc2 = cc + (k if d == "H" else 0)
-                    if rr2 == r and cc2 == c:
-                        self.grid[r][c] = ch2
-
-    def _score_grid(self):
-        """Count intersections in current grid."""
-        score = 0
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.grid[r][c] != ' ':
-                    count = 0
-                    for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                        rr, cc = r+dr, c+dc
-                        if 0 <= rr < self.size and 0 <= cc < self.size and self.grid[rr][cc] != ' ':
-                            count += 1
-                    if count >= 2:  # intersection point
-                        score += 1
-        return score
+        span = self.grid.span(row, col, direction, len(word))
+        counts = self.counts[span]
+        self.score -= counts.count(2)
+        counts = counts.translate(_DEC)
+        self.counts[span] = counts
+        # letters stay where another word still covers the cell
+        self.grid.erase(row, col, direction, len(word), keep=counts)
 
     def solve(self):
         """Main recursive solver."""
         self.placed = []
+        self.placed_ids = []
+        if not self.words:
+            return self.grid, [], 0
+        if self.time_budget_ms is not None:
+            self.deadline = time.perf_counter() + self.time_budget_ms / 1000
         first = self.words[0]
-        start_row = self.size // 2
-        start_col = (self.size - len(first)) // 2
-        self._place(first, start_row, start_col, "H")
-        self.placed.append((first, start_row, start_col, "H"))
-        self._search(self.words[1:])
+        if self.first_direction == "V":
+            start_row = (self.size - len(first)) // 2
+            start_col = self.size // 2
+        else:
+            start_row = self.size // 2
+            start_col = (self.size - len(first)) // 2
+        self._place(first, start_row, start_col, self.first_direction)
+        self.placed.append((first, start_row, start_col, self.first_direction))
+        self.placed_ids.append(self.order[0])
+        self._search(1)
         return self.best_grid, self.best_positions, self.best_score
 
-    def _search(self, remaining):
-        if not remaining:
-            score = self._score_grid()
-            if score > self.best_score:
-                self.best_score = score
-                self.best_grid = [row[:] for row in self.grid]
+    def _search(self, k):
+        """Place self.order[k:] on top of the current grid."""
+        self.stats["nodes"] += 1
+        # Once a complete layout exists, running out of budget unwinds the search;
+        # before that we keep descending so there is always something to return.
+        if self.best_grid is not None and self._out_of_budget():
+            self.timed_out = True
+            return
+
+        best_key = (len(self.best_positions), self.best_score)
+        if k == len(self.order):
+            if (len(self.placed), self.score) > best_key:
+                self.best_score = self.score
+                self.best_grid = self.grid.copy()
                 self.best_positions = self.placed[:]
+                if self.on_improve is not None:
+                    self.on_improve(self.best_grid.copy(), self.best_positions[:], self.score)
             return
 
-        word = remaining[0]
-        best_local_score = 0
-        placed_any = False
+        # Branch and bound: prune if even placing every remaining word with all of
+        # its shareable letters crossing can't beat the best layout found so far.
+        optimistic = (len(self.placed) + len(self.order) - k, self.score + self.bounds[k])
+        if optimistic <= best_key:
+            return
 
-        for existing in self.placed:
-            w2, r2, c2, d2 = existing
-            for (i1, i2) in self.intersections.get((word, w2), []):
+        wid = self.order[k]
+        word = self.pool[wid]
+        crossings = self.intersections[wid]
+        candidates = set()
+        for pid, (w2, r2, c2, d2) in zip(self.placed_ids, self.placed):
+            for (i1, i2) in crossings.get(pid, ()):
                 if d2 == "H":
                     # new word vertical
-                    row = r2 - i1
-                    col = c2 + i2
-                    direction = "V"
+                    candidates.add((r2 - i1, c2 + i2, "V"))
                 else:
                     # new word horizontal
-                    row = r2 + i2
-                    col = c2 - i1
-                    direction = "H"
-
-                if self._can_place(word, row, col, direction):
-                    self._place(word, row, col, direction)
-                    self.placed.append((word, row, col, direction))
-                    self._search(remaining[1:])
-                    self.placed.pop()
-                    self._remove(word, row, col, direction)
-                    placed_any = True
+                    candidates.add((r2 + i2, c2 - i1, "H"))
+
+        self.stats["candidates"] += len(candidates)
+        # Most crossings first, so good layouts are found early and tighten the bound
+        ordered = sorted(
+            ((self._gain(word, row, col, d), row, col, d)
+             for row, col, d in candidates if self._can_place(word, row, col, d)),
+            reverse=True,
+        )
 
         # fallback random placement if no intersection possible
-        if not placed_any:
+        if not ordered:
+            self.stats["fallbacks"] += 1
             for _ in range(100):
-                d = random.choice(["H","V"])
-                row = random.randint(0, self.size - (len(word) if d == "V" else 1))
-                col = random.randint(0, self.size - (len(word) if d == "H" else 1))
+                d = self.rng.choice(["H","V"])
+                row = self.rng.randint(0, self.size - (len(word) if d == "V" else 1))
+                col = self.rng.randint(0, self.size - (len(word) if d == "H" else 1))
                 if self._can_place(word, row, col, d):
-                    self._place(word, row, col, d)
-                    self.placed.append((word, row, col, d))
-                    self._search(remaining[1:])
-                    self.placed.pop()
-                    self._remove(word, row, col, d)
+                    ordered.append((0, row, col, d))
                     break
 
-def create_crossword(words, clues, grid_size=15):
-    solver = CrosswordSolver(words, clues, size=grid_size)
+        for _, row, col, direction in ordered:
+            self._place(word, row, col, direction)
+            self.placed.append((word, row, col, direction))
+            self.placed_ids.append(wid)
+            self._search(k + 1)
+            self.placed_ids.pop()
+            self.placed.pop()
+            self._remove(word, row, col, direction)
+            if self.timed_out:
+                return
+
+        # the word doesn't fit anywhere: leave it out rather than losing the branch
+        if not ordered:
+            self._search(k + 1)
+
+def create_crossword(words, clues, grid_size=15, time_budget_ms=None, max_words=None, stats=None, seed=None,
+                     node_budget=None):
+    solver = CrosswordSolver(words, clues, size=grid_size, time_budget_ms=time_budget_ms, max_words=max_words,
+                             seed=seed, node_budget=node_budget)
     grid, positions, score = solver.solve()
+    if stats is not None:
+        stats.update(solver.stats)
     return grid, positions
 
 def grid_to_display(grid):
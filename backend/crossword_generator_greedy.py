@@ -1,14 +1,21 @@
 import random
 from typing import List, Tuple, Optional
 
+from grid import Grid
+from validator import placement_is_clean
+
 class Crossword:
-    def __init__(self, size: int = 15):
+    def __init__(self, size: int = 15, seed: Optional[int] = None, rng: Optional[random.Random] = None):
         self.size = size
-        self.grid = [[' ' for _ in range(size)] for _ in range(size)]
+        self.rng = rng or random.Random(seed)
+        self.grid = Grid(size)
         self.placed_words = []  # List of dicts with word, row, col, dir
 
     def place_words(self, words: List[str]):
-        words = [w.upper() for w in words]
+        # words longer than the grid can't be placed anywhere
+        words = [w.upper() for w in words if len(w) <= self.size]
+        if not words:
+            return self.grid, self.placed_words
         words.sort(key=lambda w: -len(w))  # longest first
 
         # Place first word in center horizontally
@@ -61,56 +68,29 @@ class Crossword:
         return best_pos
 
     def _score_position(self, word: str, row: int, col: int, direction: str) -> int:
-        """Score based on number of intersections created."""
-        score = 0
-        for i, ch in enumerate(word):
-            r, c = (row + i, col) if direction == "V" else (row, col + i)
-            if 0 <= r < self.size and 0 <= c < self.size:
-                if self.grid[r][c] == ch:
-                    score += 1
-        return score
+        """Score based on number of intersections created (placement already checked)."""
+        return self.grid.crossings(row, col, direction, len(word))
 
     def _can_place(self, word: str, row: int, col: int, direction: str) -> bool:
         """Check if a word can be placed without conflicts or adjacency errors."""
-        for i, ch in enumerate(word):
-            r, c = (row + i, col) if direction == "V" else (row, col + i)
-            # Out of bounds
-            if not (0 <= r < self.size and 0 <= c < self.size):
-                return False
-            # Conflict
-            cell = self.grid[r][c]
-            if cell != ' ' and cell != ch:
-                return False
-
-            # Optional: Check adjacency to avoid touching sides
-            for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                rr, cc = r + dr, c + dc
-                if 0 <= rr < self.size and 0 <= cc < self.size:
-                    neighbor = self.grid[rr][cc]
-                    if neighbor != ' ' and neighbor != ch:
-                        # Allow vertical adjacency if it's the intersection itself
-                        if not (cell == ch):
-                            return False
-        return True
+        return placement_is_clean(self.grid, word, row, col, direction)
 
     def _place_word(self, word: str, row: int, col: int, direction: str):
-        for i, ch in enumerate(word):
-            r, c = (row + i, col) if direction == "V" else (row, col + i)
-            self.grid[r][c] = ch
+        self.grid.write(word, row, col, direction)
 
     def _try_random_place(self, word: str):
         for _ in range(200):
-            direction = random.choice(["H", "V"])
-            row = random.randint(0, self.size - (len(word) if direction == "V" else 1))
-            col = random.randint(0, self.size - (len(word) if direction == "H" else 1))
+            direction = self.rng.choice(["H", "V"])
+            row = self.rng.randint(0, self.size - (len(word) if direction == "V" else 1))
+            col = self.rng.randint(0, self.size - (len(word) if direction == "H" else 1))
             if self._can_place(word, row, col, direction):
                 self._place_word(word, row, col, direction)
                 self.placed_words.append({"word": word, "row": row, "col": col, "dir": direction})
                 return True
         return False
 
-def create_crossword(words: List[str], grid_size: int = 15):
-    c = Crossword(grid_size)
+def create_crossword(words: List[str], grid_size: int = 15, seed: Optional[int] = None):
+    c = Crossword(grid_size, seed=seed)
     return c.place_words(words)
 
 def grid_to_display(grid):
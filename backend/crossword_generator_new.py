@@ -1,15 +1,19 @@
 import random
 
+from grid import Grid
+from validator import letter_runs, placement_is_clean
+
 class CrosswordSolver:
     """
     Crossword solver using a heuristic approach:
     - Places longest words first
     - First word in the center
-    - Uses letter-to-position map for intersections
+    - Uses a per-letter anchor index (cell -> free crossing direction) for intersections
     - Scores candidate positions based on intersections
     """
 
-    def __init__(self, words, clues, size=15):
+    def __init__(self, words, clues, size=15, presorted=False, first_direction="H", seed=None, rng=None,
+                 lexicon=None, min_words=None):
         """
         Initialize the crossword solver.
 
@@ -17,20 +21,40 @@ class CrosswordSolver:
             words (list[str]): List of words to place
             clues (dict): Dictionary of clues (used for later reference)
             size (int): Size of the grid (size x size)
+            presorted (bool): Keep the given word order instead of longest first
+            first_direction (str): Direction of the first (centred) word, 'H' or 'V'
+            seed (int | None): Seed for the random fallback placement
+            rng (random.Random | None): Explicit RNG, takes precedence over seed
+            lexicon (Lexicon | None): Local word list used to replace words that can't be
+                placed and to add crossing words
+            min_words (int | None): With a lexicon, add crossing words until this many are placed
         """
         self.words = [w.upper() for w in words]
         self.clues = clues
         self.size = size
-        self.grid = [[' ' for _ in range(size)] for _ in range(size)]
+        self.grid = Grid(size)
         self.placed = []  # Stores tuples (word, row, col, direction)
-        self.letter_positions = {}  # Map letters to grid positions for fast intersection lookup
+        self.cell_directions = {}  # (r, c) -> directions of the words covering the cell
+        self.anchors = {}  # letter -> {(r, c): direction a new word can cross the cell in}
+        # Work counters: words processed, candidate placements checked, random fallbacks, lexicon words added
+        self.stats = {"nodes": 0, "candidates": 0, "fallbacks": 0, "lexicon_words": 0}
+
+        self.first_direction = first_direction
+        self.rng = rng or random.Random(seed)
+        self.lexicon = lexicon
+        self.min_words = min_words
+        # words that didn't fit anywhere; those longer than the grid never get a try
+        self.unplaced = [w for w in self.words if len(w) > size]
+        if self.unplaced:
+            self.words = [w for w in self.words if len(w) <= size]
 
         # Sort words longest first for better placement
-        self.words.sort(key=len, reverse=True)
+        if not presorted:
+            self.words.sort(key=len, reverse=True)
 
     def _can_place(self, word, row, col, direction):
         """
-        Check if a word can be placed at a given position.
+        Check if a word can be placed at a given position without touching other words.
 
         Args:
             word (str): Word to place
@@ -41,19 +65,11 @@ class CrosswordSolver:
         Returns:
             bool: True if placement is valid
         """
-        for i, ch in enumerate(word):
-            r = row + (i if direction == 'V' else 0)
-            c = col + (i if direction == 'H' else 0)
-            if not (0 <= r < self.size and 0 <= c < self.size):
-                return False
-            cur = self.grid[r][c]
-            if cur != ' ' and cur != ch:
-                return False
-        return True
+        return placement_is_clean(self.grid, word, row, col, direction)
 
     def _place_word(self, word, row, col, direction):
         """
-        Place a word on the grid and update the letter positions map.
+        Place a word on the grid and update the anchor index.
 
         Args:
             word (str): Word to place
@@ -61,16 +77,32 @@ class CrosswordSolver:
             col (int): Starting column
             direction (str): 'H' or 'V'
         """
+        self.grid.write(word, row, col, direction)
         for i, ch in enumerate(word):
             r = row + (i if direction == 'V' else 0)
             c = col + (i if direction == 'H' else 0)
-            self.grid[r][c] = ch
-            self.letter_positions.setdefault(ch, []).append((r, c))
+            directions = self.cell_directions.setdefault((r, c), [])
+            directions.append(direction)
+            self._update_anchor(ch, r, c, directions)
         self.placed.append((word, row, col, direction))
 
+    def _update_anchor(self, ch, r, c, directions):
+        """
+        Refresh the anchor for one cell.
+
+        A cell is an anchor while all words through it run the same way; a new
+        word can then cross it in the other direction. Once both directions are
+        used the cell can't be crossed again and is dropped from the index.
+        """
+        cells = self.anchors.setdefault(ch, {})
+        if directions and len(set(directions)) == 1:
+            cells[(r, c)] = 'V' if directions[0] == 'H' else 'H'
+        else:
+            cells.pop((r, c), None)
+
     def _score_position(self, word, row, col, direction):
         """
-        Compute score for a candidate placement based on intersections.
+        Compute score for a (valid) candidate placement based on intersections.
 
         Args:
             word (str): Word to score
@@ -81,68 +113,212 @@ class CrosswordSolver:
         Returns:
             int: Number of intersecting letters
         """
-        score = 0
+        return self.grid.crossings(row, col, direction, len(word))
+
+    def _pattern(self, row, col, direction, length):
+        """
+        Lexicon query for a slot: grid letters, '?' for empty cells.
+
+        Returns None if the slot leaves the grid, runs into a letter just before or
+        after it or alongside it, or overlaps a word going the same way.
+        """
+        grid = self.grid
+        if not grid.in_bounds(row, col, direction, length):
+            return None
+        if not (grid.ends_clear(row, col, direction, length) and grid.sides_clear(row, col, direction, length)
+                and grid.crossings_apart(row, col, direction, length)):
+            return None
+        return grid.read(row, col, direction, length).replace(b"\0", b"?").decode("latin-1")
+
+    def _place_from_lexicon(self, lengths):
+        """
+        Place a lexicon word that crosses the grid at an anchor.
+
+        Anchors are tried in random order; at the first one where any word fits,
+        the fit with the most crossings wins.
+
+        Args:
+            lengths (iterable[int]): Word lengths to try
+
+        Returns:
+            str | None: The word placed
+        """
+        in_grid = {p[0] for p in self.placed}
+        anchors = [(r, c, d) for cells in self.anchors.values() for (r, c), d in cells.items()]
+        self.rng.shuffle(anchors)
+        for r, c, direction in anchors:
+            best = None
+            for length in lengths:
+                for i in range(length):
+                    row = r - i if direction == 'V' else r
+                    col = c - i if direction == 'H' else c
+                    pattern = self._pattern(row, col, direction, length)
+                    if pattern is None:
+                        continue
+                    for word in self.lexicon.query(pattern, limit=1, exclude=in_grid):
+                        score = self._score_position(word, row, col, direction)
+                        if best is None or score > best[0]:
+                            best = (score, word, row, col)
+            if best is not None:
+                _, word, row, col = best
+                self._place_word(word, row, col, direction)
+                self.clues.setdefault(word, {"word": word, "clue": self.lexicon.clue(word) or ""})
+                self.stats["lexicon_words"] += 1
+                return word
+        return None
+
+    def _place_first(self, word):
+        """Place a word in the center of the empty grid."""
+        if self.first_direction == "V":
+            start_row = (self.size - len(word)) // 2
+            start_col = self.size // 2
+        else:
+            start_row = self.size // 2
+            start_col = (self.size - len(word)) // 2
+        self._place_word(word, start_row, start_col, self.first_direction)
+
+    def _place_next(self, word):
+        """
+        Place a word on the current grid: best crossing first, random fallback.
+
+        Returns:
+            bool: False if it didn't fit anywhere
+        """
+        if len(word) > self.size:
+            return False
+        self.stats["nodes"] += 1
+        candidates = []
+        seen = set()
+
+        # Find potential intersections: each anchor with a matching letter gives one start
+        for i, ch in enumerate(word):
+            for (r, c), direction in self.anchors.get(ch, {}).items():
+                row = r - i if direction == 'V' else r
+                col = c - i if direction == 'H' else c
+                if (row, col, direction) in seen:
+                    continue
+                seen.add((row, col, direction))
+                self.stats["candidates"] += 1
+                if self._can_place(word, row, col, direction):
+                    score = self._score_position(word, row, col, direction)
+                    candidates.append((score, row, col, direction))
+
+        # Sort by score descending (max intersections first)
+        candidates.sort(key=lambda x: x[0], reverse=True)
+
+        for score, row, col, direction in candidates[:5]:  # try top 5
+            self._place_word(word, row, col, direction)
+            return True
+
+        # Fallback random placement if no intersections found
+        self.stats["fallbacks"] += 1
+        for _ in range(50):
+            direction = self.rng.choice(['H', 'V'])
+            row = self.rng.randint(0, self.size - (len(word) if direction == 'V' else 1))
+            col = self.rng.randint(0, self.size - (len(word) if direction == 'H' else 1))
+            if self._can_place(word, row, col, direction):
+                self._place_word(word, row, col, direction)
+                return True
+        return False
+
+    def add_word(self, word):
+        """
+        Place one more word on the existing grid, leaving the placed words where they are.
+
+        Returns:
+            bool: False if it doesn't fit (the grid is unchanged)
+        """
+        word = word.upper()
+        if len(word) > self.size:
+            return False
+        if self.placed:
+            if not self._place_next(word):
+                return False
+        else:
+            self._place_first(word)
+        self.words.append(word)
+        return True
+
+    def remove_word(self, word):
+        """
+        Take a placed word off the grid. Cells it shares with other words keep their
+        letter; the anchor index is updated for every cell it covered. Words that
+        didn't fit earlier are tried again, since the removal may have made room.
+
+        The letters left behind can end up side by side (the crossings of two
+        neighbouring words); then the word is put back and ValueError is raised,
+        so the grid never holds a letter run that isn't a word.
+
+        Returns:
+            list[str] | None: Previously unplaced words placed now, or None if the word isn't placed
+        """
+        word = word.upper()
+        for index, (w, row, col, direction) in enumerate(self.placed):
+            if w == word:
+                break
+        else:
+            return None
+        del self.placed[index]
         for i, ch in enumerate(word):
             r = row + (i if direction == 'V' else 0)
             c = col + (i if direction == 'H' else 0)
-            if self.grid[r][c] == ch:
-                score += 1
-        return score
+            directions = self.cell_directions[(r, c)]
+            directions.remove(direction)
+            if not directions:
+                del self.cell_directions[(r, c)]
+                self.grid.set(r, c, ' ')
+            self._update_anchor(ch, r, c, directions)
+
+        # only the word's own line and the lines crossing it can have changed
+        n = len(word)
+        rows = range(row, row + n) if direction == 'V' else [row]
+        cols = [col] if direction == 'V' else range(col, col + n)
+        placed = set(self.placed)
+        stray = [run[0] for run in letter_runs(self.grid, rows, cols) if run not in placed]
+        if stray:
+            self._place_word(word, row, col, direction)
+            self.placed.insert(index, self.placed.pop())
+            raise ValueError(f"removing {word} would leave {', '.join(stray)} behind, which isn't a word")
+
+        if word in self.words:
+            self.words.remove(word)
+
+        retried = [w for w in self.unplaced if self._place_next(w)]
+        self.unplaced = [w for w in self.unplaced if w not in retried]
+        return retried
 
     def solve(self):
         """
         Solve the crossword by placing all words.
 
         Returns:
-            grid (list[list[str]]): Completed grid
+            grid (Grid): Completed grid
             placed (list[tuple]): List of placed words with positions and directions
         """
         if not self.words:
             return self.grid, self.placed
 
-        # Place the first word in the center horizontally
-        first_word = self.words[0]
-        start_row = self.size // 2
-        start_col = (self.size - len(first_word)) // 2
-        self._place_word(first_word, start_row, start_col, "H")
+        # Place the first word in the center
+        self._place_first(self.words[0])
 
         # Place remaining words
         for word in self.words[1:]:
-            candidates = []
-
-            # Find potential intersections based on letters
-            for i, ch in enumerate(word):
-                for r, c in self.letter_positions.get(ch, []):
-                    for direction in ['H', 'V']:
-                        row = r - i if direction == 'V' else r
-                        col = c - i if direction == 'H' else c
-                        if self._can_place(word, row, col, direction):
-                            score = self._score_position(word, row, col, direction)
-                            candidates.append((score, row, col, direction))
-
-            # Sort by score descending (max intersections first)
-            candidates.sort(key=lambda x: x[0], reverse=True)
-
-            placed = False
-            for score, row, col, direction in candidates[:5]:  # try top 5
-                self._place_word(word, row, col, direction)
-                placed = True
-                break
+            if not self._place_next(word):
+                self.unplaced.append(word)
 
-            # Fallback random placement if no intersections found
-            if not placed:
-                for _ in range(50):
-                    direction = random.choice(['H', 'V'])
-                    row = random.randint(0, self.size - (len(word) if direction == 'V' else 1))
-                    col = random.randint(0, self.size - (len(word) if direction == 'H' else 1))
-                    if self._can_place(word, row, col, direction):
-                        self._place_word(word, row, col, direction)
-                        break
+        if self.lexicon is not None:
+            # Swap words that didn't fit for lexicon words of about the same length
+            for word in self.unplaced:
+                self._place_from_lexicon([len(word), len(word) - 1, len(word) + 1])
+            # Thin grid: add crossing words until min_words are placed
+            while self.min_words and len(self.placed) < self.min_words:
+                if self._place_from_lexicon(range(3, 8)) is None:
+                    break
 
         return self.grid, self.placed
 
 
-def create_crossword(words, clues, grid_size=15):
+def create_crossword(words, clues, grid_size=15, stats=None, seed=None, lexicon=None, min_words=None):
     """
     Helper function to generate a crossword grid and positions.
 
@@ -150,12 +326,18 @@ def create_crossword(words, clues, grid_size=15):
         words (list[str]): List of words
         clues (dict): Dictionary of clues
         grid_size (int): Grid size
+        stats (dict | None): Filled with the solver's work counters when given
+        seed (int | None): Seed for the solver's RNG; the same seed and words give the same grid
+        lexicon (Lexicon | None): Word list to repair and fill the layout from
+        min_words (int | None): With a lexicon, fill the grid up to this many words
 
     Returns:
-        grid (list[list[str]]), positions (list[tuple])
+        grid (Grid), positions (list[tuple])
     """
-    solver = CrosswordSolver(words, clues, size=grid_size)
+    solver = CrosswordSolver(words, clues, size=grid_size, seed=seed, lexicon=lexicon, min_words=min_words)
     grid, positions = solver.solve()
+    if stats is not None:
+        stats.update(solver.stats)
     return grid, positions
 
 
@@ -165,4 +347,6 @@ def grid_to_display(grid):
 
     Empty spaces become ''.
     """
+    if isinstance(grid, Grid):
+        return grid.to_display()
     return [[cell if cell != ' ' else '' for cell in row] for row in grid]
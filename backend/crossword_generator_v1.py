@@ -1,30 +1,35 @@
 # backend/crossword_generator.py
 import random
 
-def create_crossword(words, grid_size=15):
-    grid = [[' ' for _ in range(grid_size)] for _ in range(grid_size)]
+from grid import Grid
+from validator import placement_is_clean
+
+def create_crossword(words, grid_size=15, seed=None, rng=None):
+    rng = rng or random.Random(seed)
+    grid = Grid(grid_size)
     placed_words = []
 
     for word in words:
         word = word.upper()
         placed = False
+        if len(word) > grid_size:
+            print(f"Couldn't place {word}")
+            continue
         for _ in range(100):  # Try up to 100 times to place a word
-            direction = random.choice(['H', 'V'])
+            direction = rng.choice(['H', 'V'])
             if direction == 'H':
-                row = random.randint(0, grid_size - 1)
-                col = random.randint(0, grid_size - len(word))
-                if all(grid[row][col + i] in (' ', word[i]) for i in range(len(word))):
-                    for i in range(len(word)):
-                        grid[row][col + i] = word[i]
+                row = rng.randint(0, grid_size - 1)
+                col = rng.randint(0, grid_size - len(word))
+                if placement_is_clean(grid, word, row, col, direction):
+                    grid.write(word, row, col, direction)
                     placed_words.append((word, row, col, direction))
                     placed = True
                     break
             else:
-                row = random.randint(0, grid_size - len(word))
-                col = random.randint(0, grid_size - 1)
-                if all(grid[row + i][col] in (' ', word[i]) for i in range(len(word))):
-                    for i in range(len(word)):
-                        grid[row + i][col] = word[i]
+                row = rng.randint(0, grid_size - len(word))
+                col = rng.randint(0, grid_size - 1)
+                if placement_is_clean(grid, word, row, col, direction):
+                    grid.write(word, row, col, direction)
                     placed_words.append((word, row, col, direction))
                     placed = True
                     break
@@ -0,0 +1,175 @@
+EMPTY = 0
+
+# translate() tables: occupied cells -> 0xFF / empty -> 0xFF, and empty <-> ' ' for text
+_OCCUPIED = bytes([0x00] + [0xFF] * 255)
+_FREE = bytes([0xFF] + [0x00] * 255)
+_TO_TEXT = bytes([ord(' ')]) + bytes(range(1, 256))
+_FROM_TEXT = bytes(range(32)) + bytes([EMPTY]) + bytes(range(33, 256))
+
+
+def encode(word):
+    """Cell bytes for a word; letters outside Latin-1 (rare in Dutch) become '?'."""
+    return word.encode("latin-1", "replace")
+
+
+def _int(data):
+    return int.from_bytes(data, "big")
+
+
+class Grid:
+    """
+    Crossword grid on a flat bytearray, shared by all layout engines.
+
+    Cell (r, c) lives at r * cols + c and holds a Latin-1 letter byte, or 0 when
+    empty. A word's cells are one slice (stride 1 across, stride cols down), so
+    writes, crossing counts and adjacency checks work on whole words with slice
+    and big-int operations instead of a Python loop per cell. fits() is the
+    exception: most candidates clash within a letter or two, and a strided scan
+    that stops at the first clash beats building the slice. Indexing and iteration give row strings with
+    ' ' for empty cells, so code written against the old list-of-lists grid keeps
+    working for reads.
+    """
+
+    __slots__ = ("rows", "cols", "cells")
+
+    def __init__(self, rows, cols=None, cells=None):
+        self.rows = rows
+        self.cols = rows if cols is None else cols
+        self.cells = bytearray(self.rows * self.cols) if cells is None else cells
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a grid from rows of one-character strings (' ' or '' for empty)."""
+        width = max((len(row) for row in rows), default=0)
+        grid = cls(len(rows), width)
+        for r, row in enumerate(rows):
+            text = "".join(cell or ' ' for cell in row).ljust(width)
+            grid.cells[r * width:(r + 1) * width] = encode(text).translate(_FROM_TEXT)
+        return grid
+
+    def copy(self):
+        return Grid(self.rows, self.cols, bytearray(self.cells))
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, r):
+        return self.row_text(r)
+
+    def __iter__(self):
+        return (self.row_text(r) for r in range(self.rows))
+
+    def row_text(self, r):
+        return self.cells[r * self.cols:(r + 1) * self.cols].translate(_TO_TEXT).decode("latin-1")
+
+    def get(self, r, c):
+        """Letter at (r, c), ' ' if empty or outside the grid."""
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            value = self.cells[r * self.cols + c]
+            return chr(value) if value else ' '
+        return ' '
+
+    def set(self, r, c, ch):
+        self.cells[r * self.cols + c] = ord(ch) if ch.strip() else EMPTY
+
+    def in_bounds(self, row, col, direction, length):
+        if row < 0 or col < 0 or length <= 0:
+            return False
+        if direction == 'V':
+            return row + length <= self.rows and col < self.cols
+        return col + length <= self.cols and row < self.rows
+
+    def span(self, row, col, direction, length):
+        """Slice of `cells` covering a word; callers check in_bounds first."""
+        start = row * self.cols + col
+        if direction == 'V':
+            return slice(start, start + (length - 1) * self.cols + 1, self.cols)
+        return slice(start, start + length)
+
+    def read(self, row, col, direction, length):
+        return bytes(self.cells[self.span(row, col, direction, length)])
+
+    def write(self, word, row, col, direction):
+        if not self.in_bounds(row, col, direction, len(word)):
+            raise ValueError(f"{word} at ({row}, {col}, {direction}) leaves the {self.rows}x{self.cols} grid")
+        self.cells[self.span(row, col, direction, len(word))] = encode(word)
+
+    def erase(self, row, col, direction, length, keep=None):
+        """Empty a slot's cells, except where `keep` (one byte per cell) is non-zero."""
+        span = self.span(row, col, direction, length)
+        if keep is None:
+            self.cells[span] = bytes(length)
+            return
+        kept = _int(self.cells[span]) & _int(keep.translate(_OCCUPIED))
+        self.cells[span] = kept.to_bytes(length, "big")
+
+    def fits(self, word, row, col, direction):
+        """True if the word stays inside the grid and every occupied cell it covers holds its letter."""
+        # bounds inlined and an early exit on the first clash: this is the engines' inner loop
+        n = len(word)
+        cols = self.cols
+        if row < 0 or col < 0:
+            return False
+        if direction == 'V':
+            if row + n > self.rows or col >= cols:
+                return False
+            step = cols
+        else:
+            if col + n > cols or row >= self.rows:
+                return False
+            step = 1
+        cells = self.cells
+        pos = row * cols + col
+        for want in encode(word):
+            have = cells[pos]
+            if have and have != want:
+                return False
+            pos += step
+        return True
+
+    def crossings(self, row, col, direction, length):
+        """Occupied cells under a slot, i.e. the letters a word there would share."""
+        current = self.read(row, col, direction, length)
+        return length - current.count(EMPTY)
+
+    def ends_clear(self, row, col, direction, length):
+        """True if the cells just before and after the slot are empty or off the grid."""
+        dr, dc = (1, 0) if direction == 'V' else (0, 1)
+        end_row, end_col = row + dr * length, col + dc * length
+        return self.get(row - dr, col - dc) == ' ' and self.get(end_row, end_col) == ' '
+
+    def sides_clear(self, row, col, direction, length):
+        """
+        True if no cell a word in the slot would newly fill has a letter beside it
+        (above/below for a horizontal slot, left/right for a vertical one).
+        Cells the word crosses are exempt, their neighbours belong to the other word.
+        """
+        free = _int(self.read(row, col, direction, length).translate(_FREE))
+        for offset in (-1, 1):
+            r, c = (row, col + offset) if direction == 'V' else (row + offset, col)
+            side = self._read_clipped(r, c, direction, length)
+            if _int(side) & free:
+                return False
+        return True
+
+    def crossings_apart(self, row, col, direction, length):
+        """
+        True if no two occupied cells in the slot are next to each other. In a clean
+        grid two adjacent letters along the slot can only belong to a word running
+        the same way, which a new word there would overlap.
+        """
+        occupied = _int(self.read(row, col, direction, length).translate(_OCCUPIED))
+        return occupied & (occupied >> 8) == 0
+
+    def _read_clipped(self, row, col, direction, length):
+        """Like read(), but rows/columns outside the grid read as empty."""
+        if direction == 'V' and not 0 <= col < self.cols or direction == 'H' and not 0 <= row < self.rows:
+            return bytes(length)
+        return self.read(row, col, direction, length)
+
+    def filled(self):
+        return len(self.cells) - self.cells.count(EMPTY)
+
+    def to_display(self):
+        """Rows of one-character strings with '' for empty cells."""
+        return [[chr(v) if v else '' for v in self.cells[r * self.cols:(r + 1) * self.cols]] for r in range(self.rows)]
@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+
+
+def canonical_words(words):
+    """
+    Canonical form of a word list: upper case, without duplicates, longest first
+    then alphabetical. Solving this order with a fixed seed is reproducible no
+    matter how the caller ordered the words.
+    """
+    return sorted({w.strip().upper() for w in words if w.strip()}, key=lambda w: (-len(w), w))
+
+
+class LayoutCache:
+    """
+    Bounded LRU of solved layouts.
+
+    Keys are (canonical word set, grid size, engine, seed, engine options); since
+    every engine is deterministic for a given seed, a hit is exactly the layout a
+    fresh solve would produce. Searches stopped by the clock (budgeted requests
+    without a seed) are the exception: they return whatever was found in time,
+    and the cache pins that result in this process only. Seeded requests stop on
+    a node count instead, so they give the same layout anywhere.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(words, grid_size, engine, seed, **options):
+        return (tuple(canonical_words(words)), grid_size, engine, seed, tuple(sorted(options.items())))
+
+    def get(self, key):
+        """
+        Returns:
+            (grid, placed) or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key, grid, placed):
+        with self._lock:
+            self._entries[key] = (grid, [tuple(p) for p in placed])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
@@ -0,0 +1,134 @@
+import os
+import re
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "dutch_words.txt")
+
+# Letters a crossword cell can hold; anything else (hyphens, digits, accents) is skipped
+_WORD_RE = re.compile(r"^[A-Z]+$")
+WILDCARDS = "?._ "
+
+
+class Lexicon:
+    """
+    Local word list with a pattern index.
+
+    Words are grouped by length; for every (length, position, letter) there is a
+    bitset (a Python int) of the words with that letter at that position. A query
+    like "?A??E" is the AND of two bitsets, so it costs a few big-int operations
+    instead of a scan of the word list.
+    """
+
+    def __init__(self, words, clues=None):
+        """
+        Args:
+            words (iterable[str]): Words; duplicates and non A-Z entries are dropped
+            clues (dict | None): Optional word -> clue
+        """
+        self.clues = {w.upper(): c for w, c in (clues or {}).items()}
+        self.by_length = {}  # length -> [word]
+        seen = set()
+        for word in words:
+            word = word.strip().upper()
+            if word in seen or not _WORD_RE.match(word):
+                continue
+            seen.add(word)
+            self.by_length.setdefault(len(word), []).append(word)
+
+        self._all = {}  # length -> bitset with every word of that length
+        self._bits = {}  # (length, position, letter) -> bitset
+        for length, group in self.by_length.items():
+            self._all[length] = (1 << len(group)) - 1
+            for index, word in enumerate(group):
+                bit = 1 << index
+                for pos, ch in enumerate(word):
+                    key = (length, pos, ch)
+                    self._bits[key] = self._bits.get(key, 0) | bit
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_PATH):
+        """
+        Load a word list: one word per line, optionally followed by a tab and a clue.
+        Blank lines and lines starting with '#' are ignored.
+        """
+        words = []
+        clues = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.startswith("#"):
+                    continue
+                word, _, clue = line.partition("\t")
+                word = word.strip().upper()
+                words.append(word)
+                if clue.strip():
+                    clues[word] = clue.strip()
+        return cls(words, clues)
+
+    def __len__(self):
+        return sum(len(group) for group in self.by_length.values())
+
+    def __contains__(self, word):
+        return self.matches(word.upper()) != 0
+
+    def all_mask(self, length):
+        """Bitset of every word of the given length."""
+        return self._all.get(length, 0)
+
+    def mask(self, length, pos, letter):
+        """Bitset of the words of the given length with `letter` at `pos`."""
+        return self._bits.get((length, pos, letter), 0)
+
+    def word(self, length, index):
+        """The word behind bit `index` of a bitset for `length`."""
+        return self.by_length[length][index]
+
+    def matches(self, pattern):
+        """Bitset of the words of len(pattern) matching it ('?', '.', '_' or ' ' are wildcards)."""
+        length = len(pattern)
+        bits = self.all_mask(length)
+        for pos, ch in enumerate(pattern):
+            if not bits:
+                break
+            if ch not in WILDCARDS:
+                bits &= self.mask(length, pos, ch.upper())
+        return bits
+
+    def count(self, pattern):
+        return bin(self.matches(pattern)).count("1")
+
+    def query(self, pattern, limit=None, exclude=()):
+        """
+        Words matching a pattern such as "?A??E", in word-list order.
+
+        Args:
+            pattern (str): Letters and wildcards
+            limit (int | None): Stop after this many matches
+            exclude (container): Words to leave out (e.g. already in the grid)
+        """
+        group = self.by_length.get(len(pattern), [])
+        bits = self.matches(pattern)
+        found = []
+        while bits and (limit is None or len(found) < limit):
+            low = bits & -bits
+            word = group[low.bit_length() - 1]
+            if word not in exclude:
+                found.append(word)
+            bits ^= low
+        return found
+
+    def clue(self, word):
+        return self.clues.get(word.upper())
+
+
+_default = None
+
+
+def get_lexicon():
+    """
+    The shared lexicon, loaded on first use from CROSSWORD_LEXICON (defaults to
+    the bundled data/dutch_words.txt).
+    """
+    global _default
+    if _default is None:
+        _default = Lexicon.from_file(os.getenv("CROSSWORD_LEXICON", DEFAULT_PATH))
+    return _default
@@ -1,35 +1,315 @@
 # backend/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from crossword_generator_new import create_crossword, grid_to_display
-from ai_word_generator import get_words_by_theme
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from crossword_generator_new import CrosswordSolver as GreedySolver, create_crossword, grid_to_display
+from ai_word_generator import get_words_by_theme_async, word_cache
+from multistart import default_engine as multistart_engine
+from metrics import StageTimer, invalid_layouts, record_solver_stats, registry, start_profiler
+from layout_cache import LayoutCache, canonical_words
+from lexicon import get_lexicon
+from grid import Grid
+from puzzle_archive import PuzzleArchive
+from puzzle_store import PuzzleStore
+from responses import dumps, encoded_response, etag_matches, json_response, render
+from sessions import PuzzleSession, SessionStore
+from validator import check_layout
+from word_providers import current_provider
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
+import asyncio
+import copy
+import functools
 import os
+import random
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def warm_layout_pool():
+    multistart_engine.warm()
+
+
+@app.on_event("shutdown")
+def stop_layout_pool():
+    multistart_engine.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_word_provider():
+    provider = current_provider()
+    if provider is not None:
+        await provider.aclose()
+
+
+@app.middleware("http")
+async def profile_slow_requests(request: Request, call_next):
+    profiler = start_profiler()
+    try:
+        return await call_next(request)
+    finally:
+        if profiler is not None:
+            profiler.stop(f"{request.method} {request.url.path}")
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    # ETag so browser clients can send it back as If-None-Match
+    expose_headers=["Server-Timing", "ETag"],
 )
+
+
+def _word_cache_metrics():
+    stats = word_cache.stats
+    return [
+        ("crossword_word_cache_hits_total", "counter", "Theme word lookups served from the cache.", stats["hits"]),
+        ("crossword_word_cache_misses_total", "counter", "Theme word lookups that went to the LLM.", stats["misses"]),
+        ("crossword_word_cache_hit_ratio", "gauge", "Share of theme word lookups served from the cache.", word_cache.hit_rate()),
+    ]
+
+
+registry.add_collector(_word_cache_metrics)
+
+
+def _word_batcher_metrics():
+    batcher = getattr(current_provider(), "batcher", None)
+    if batcher is None:
+        return []
+    stats = batcher.stats
+    return [
+        ("crossword_llm_batch_calls_total", "counter", "Batched theme word calls sent to the LLM.", stats["calls"]),
+        ("crossword_llm_batch_requests_total", "counter", "Theme requests sent in batched calls, retries included.", stats["requests"]),
+        ("crossword_llm_batch_retries_total", "counter", "Theme requests queued again after a missing or unusable answer.", stats["retried"]),
+        ("crossword_llm_batch_failures_total", "counter", "Theme requests that ran out of attempts.", stats["failed"]),
+    ]
+
+
+registry.add_collector(_word_batcher_metrics)
+
+# Solved layouts by (canonical words, grid size, engine, seed, options)
+layout_cache = LayoutCache(max_entries=int(os.getenv("LAYOUT_CACHE_SIZE", "1024")))
+
+
+def _layout_cache_metrics():
+    return [
+        ("crossword_layout_cache_hits_total", "counter", "Layouts served without solving.", layout_cache.stats["hits"]),
+        ("crossword_layout_cache_misses_total", "counter", "Layouts that had to be solved.", layout_cache.stats["misses"]),
+    ]
+
+
+registry.add_collector(_layout_cache_metrics)
+
+# Puzzles open for editing (/sessions)
+sessions = SessionStore(
+    max_sessions=int(os.getenv("SESSION_MAX", "1000")), ttl=float(os.getenv("SESSION_TTL_S", "3600"))
+)
+
+
+def _session_metrics():
+    return [("crossword_sessions_active", "gauge", "Puzzles open for editing.", len(sessions))]
+
+
+registry.add_collector(_session_metrics)
+
+# Generated puzzles by ID (/puzzles). PUZZLE_STORE_PATH="" keeps them in memory only.
+puzzle_store = PuzzleStore(
+    path=os.getenv("PUZZLE_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzles.sqlite3")) or None,
+    max_memory=int(os.getenv("PUZZLE_STORE_MEMORY", "1024")),
+    max_rows=int(os.getenv("PUZZLE_STORE_MAX_ROWS", "100000")),
+    ttl=float(os.getenv("PUZZLE_STORE_TTL_S", 30 * 24 * 3600)) or None,
+)
+
+
+def _puzzle_store_metrics():
+    stats = puzzle_store.stats
+    return [
+        ("crossword_puzzles_saved_total", "counter", "Puzzles written to the puzzle store.", stats["saved"]),
+        ("crossword_puzzle_duplicates_total", "counter", "Saved puzzles identical to a stored one.", stats["duplicates"]),
+        ("crossword_puzzle_fetches_total", "counter", "Puzzle store lookups served from memory.", stats["memory_hits"]),
+        ("crossword_puzzle_disk_fetches_total", "counter", "Puzzle store lookups read from SQLite.", stats["disk_hits"]),
+        ("crossword_puzzles_evicted_total", "counter", "Puzzles deleted for age or to stay under the row cap.", stats["evicted"]),
+    ]
+
+
+registry.add_collector(_puzzle_store_metrics)
+
+# Pre-generated puzzles (pregenerate.py); themed requests are served from here while it has unused ones
+archive = PuzzleArchive(os.environ["CROSSWORD_ARCHIVE"]) if os.getenv("CROSSWORD_ARCHIVE") else None
+
+
+def _archive_metrics():
+    if archive is None:
+        return []
+    return [
+        ("crossword_archive_served_total", "counter", "Puzzles served from the archive.", archive.stats["served"]),
+        ("crossword_archive_misses_total", "counter", "Themed requests the archive had no puzzle for.", archive.stats["misses"]),
+        ("crossword_archive_unused", "gauge", "Archived puzzles not served yet.", len(archive)),
+    ]
+
+
+registry.add_collector(_archive_metrics)
 class GenerateRequest(BaseModel):
     theme: Optional[str] = None
+    # At most MAX_WORDS once duplicates are removed
     words: Optional[List[str]] = None
     grid_size: Optional[int] = 15
+    # Search budget for the exhaustive solver; when set it replaces the greedy one
+    time_budget_ms: Optional[int] = None
+    # Number of seeded starts to run on the process pool; the best layout wins
+    starts: Optional[int] = None
+    # With the exhaustive solver, use only the best-connected max_words of a larger word list
+    max_words: Optional[int] = None
+    # Solver seed; the response echoes it so the same puzzle can be requested again.
+    # With a seed, budgeted searches stop after a node count derived from
+    # time_budget_ms instead of on the clock, so the result doesn't depend on load
+    seed: Optional[int] = None
+    # Greedy engine: swap words that don't fit for local lexicon words and add
+    # crossing lexicon words until this many are placed
+    min_words: Optional[int] = None
+    # Layout engine; by default it follows from starts / time_budget_ms as above.
+    # "csp" fills a block-pattern template with lexicon words, theme words first
+    engine: Optional[Literal["greedy", "backtrack", "multistart", "csp"]] = None
+    # "csp" only: rows of '#' (block), '.' (open) and pre-filled letters;
+    # defaults to the built-in template for grid_size
+    template: Optional[List[str]] = None
+    # Response format: "full" (default) or "compact", with the grid as row strings
+    # ('.' for empty cells) and one numbered slot table for words, positions and clues
+    format: Optional[Literal["full", "compact"]] = None
 
+MAX_TIME_BUDGET_MS = 10000
+# Grids are flat bytearrays (grid.Grid), so large ones stay cheap
+MIN_GRID_SIZE = 9
+MAX_GRID_SIZE = 101
+MAX_STARTS = 64
+MAX_BATCH_ITEMS = 100
+# The exhaustive solver recurses once per word, so a word list can't be arbitrarily long
+MAX_WORDS = 500
+DEFAULT_GRID_SIZE = 15
+# /generate/stream keeps improving the layout for this long unless the request sets a budget
+STREAM_TIME_BUDGET_MS = 2000
+# Template fills give up after this long unless the request sets a budget
+CSP_TIME_BUDGET_MS = 3000
+# Search nodes per millisecond of budget for seeded requests, a little below what
+# one core manages. The backtracking solver's nodes get dearer with every word
+# (about 30/ms with 10 words, 5/ms with 50), so its rate is divided by the word count.
+BACKTRACK_NODES_PER_MS = 150
+CSP_NODES_PER_MS = 10
 
-@app.post("/generate")
-async def generate(req: GenerateRequest):
+
+def clamp_grid_size(size):
+    return max(MIN_GRID_SIZE, min(MAX_GRID_SIZE, size or DEFAULT_GRID_SIZE))
+
+
+def unplaced_count(words, placed_words):
+    """
+    Requested words missing from a layout. Lexicon words the solver added don't
+    make up for them, so this is never negative.
+    """
+    return len({w.upper() for w in words} - {p[0] for p in placed_words})
+
+
+def seeded_node_budget(engine, time_budget_ms, words, max_words=None):
+    """
+    The node budget that stands in for time_budget_ms when the request pins the
+    seed, so the same request gives the same layout on any machine and under any load.
+    """
+    if engine == "csp":
+        return time_budget_ms * CSP_NODES_PER_MS
+    return max(1, time_budget_ms * BACKTRACK_NODES_PER_MS // max(1, min(len(words), max_words or len(words))))
+
+
+async def solve_layout(words, clues, grid_size, seed, time_budget_ms, starts, max_words, min_words=None,
+                       engine=None, template=None, offload=False, seeded=False):
+    """
+    Run the layout engine selected by the request options, going through layout_cache.
+
+    Exhaustive solves and template fills always run on the worker pool; with
+    offload=True the greedy one does too (batches, where many layouts would
+    otherwise queue up). Otherwise the greedy one runs on a thread, so no solve
+    ever runs on the event loop. With seeded=True (the request set the seed) the
+    budgeted searches stop on seeded_node_budget() rather than the clock.
+
+    Returns:
+        grid (Grid), placed_words (list[tuple])
+    """
+    if engine is None:
+        engine = "multistart" if starts and starts > 1 else "backtrack" if time_budget_ms else "greedy"
+    if engine == "multistart":
+        starts = starts or 8
+        engine = "multistart-backtrack" if time_budget_ms else "multistart-greedy"
+        options = {"starts": starts, "time_budget_ms": time_budget_ms}
+    elif engine == "backtrack":
+        time_budget_ms = time_budget_ms or STREAM_TIME_BUDGET_MS
+        options = {"time_budget_ms": time_budget_ms, "max_words": max_words}
+    elif engine == "csp":
+        time_budget_ms = time_budget_ms or CSP_TIME_BUDGET_MS
+        options = {"time_budget_ms": time_budget_ms, "template": tuple(template) if template else None}
+    else:
+        options = {"min_words": min_words}
+    node_budget = None
+    if seeded and engine in ("backtrack", "multistart-backtrack", "csp"):
+        node_budget = seeded_node_budget(engine, time_budget_ms, words, max_words)
+        options["node_budget"] = node_budget
+    # the clock only bounds searches without a node budget
+    search_ms = None if node_budget else time_budget_ms
+    key = LayoutCache.key(words, grid_size, engine, seed, **options)
+    cached = layout_cache.get(key)
+    if cached is not None:
+        return cached
+
+    solver_stats = {}
+    if engine.startswith("multistart"):
+        grid, placed_words = await multistart_engine.solve_async(
+            words, grid_size=grid_size, starts=starts, seed=seed,
+            engine="backtrack" if time_budget_ms else "greedy", time_budget_ms=search_ms,
+            stats=solver_stats, node_budget=node_budget,
+        )
+    elif engine in ("backtrack", "csp") or offload:
+        grid, placed_words = await multistart_engine.solve_single_async(
+            words, grid_size=grid_size, engine=engine, seed=seed, time_budget_ms=search_ms,
+            max_words=max_words, min_words=min_words, template=template, stats=solver_stats,
+            node_budget=node_budget,
+        )
+        if grid is None:
+            record_solver_stats(solver_stats, unplaced=0)
+            raise HTTPException(status_code=422, detail="No fill for the template found in the lexicon within the time budget")
+    else:
+        # in-process, but on a thread: a large grid or a lexicon fill must not stall the event loop
+        grid, placed_words = await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+            create_crossword, words, clues, grid_size=grid_size, stats=solver_stats, seed=seed,
+            lexicon=get_lexicon() if min_words else None, min_words=min_words,
+        ))
+    record_solver_stats(solver_stats, unplaced=unplaced_count(words, placed_words))
+    layout_cache.put(key, grid, placed_words)
+    return grid, placed_words
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+async def resolve_words(req, timer):
+    """
+    Words and clues for a request: explicit words, the theme's LLM words, or the default set.
+
+    Returns:
+        words (list[str]) in canonical order, clues (dict)
+    """
     # Prefer explicit words if provided
     if req.words and len(req.words) > 0:
-        words = req.words
-        clues =  ["Clue for " + w for w in words]
+        words = canonical_words(req.words)
+        if len(words) > MAX_WORDS:
+            raise HTTPException(status_code=422, detail=f"At most {MAX_WORDS} words per puzzle")
+        clues = {w: {"word": w, "clue": "Clue for " + w} for w in words}
     elif req.theme:
         try:
-            words, clues = get_words_by_theme(req.theme, num_words=10, test=0)
+            with timer.stage("llm"):
+                words, clues = await get_words_by_theme_async(req.theme, num_words=10, test=0)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"AI word generation failed: {e}")
     else:
@@ -40,11 +320,19 @@ async def generate(req: GenerateRequest):
             "STRAND" : {"word":"STRAND","clue":"Plaats waar je zand en zee vindt."},
             "VAKANTIE" : {"word":"VAKANTIE","clue":"Tijd om te ontspannen en te reizen."}
         }
+    # solve the canonical order so that words + seed always give the same layout
+    return canonical_words(words), clues
 
-    grid_size = max(9, min(25, req.grid_size or 15))
-    grid, placed_words = create_crossword(words, clues, grid_size=grid_size)
+
+def puzzle_body(req, words, clues, grid, placed_words, grid_size, seed):
+    """The /generate response body (without puzzle_id); fills the clue positions in `clues`."""
     display = grid_to_display(grid)
+    quality = check_layout(grid, placed_words)
+    if not quality["valid"]:
+        invalid_layouts.inc()
     for (word, start, end, position) in placed_words :
+        # words the solver took from the lexicon have no LLM clue
+        clues.setdefault(word, {"word": word, "clue": get_lexicon().clue(word) or ""})
         clues[word]["position"] = position
         clues[word]["start"] = start
         clues[word]["end"] = end
@@ -56,5 +344,355 @@ async def generate(req: GenerateRequest):
         "clues": clues,
         "grid_size": grid_size,
         "theme": req.theme,
+        "seed": seed,
+        "quality": quality,
     }
 
+
+def archived_puzzle(req, grid_size):
+    """
+    An unused archived puzzle for a themed request, or None.
+
+    Requests that pin words or a seed, or set any layout option (engine, template,
+    starts, budgets, word counts), always go to the solver: the archive can't
+    honour them.
+    """
+    if not req.theme or req.words or req.seed is not None:
+        return None
+    layout_options = (req.engine, req.template, req.starts, req.time_budget_ms, req.max_words, req.min_words)
+    if any(option is not None for option in layout_options):
+        return None
+    record = archive.take(req.theme, grid_size)
+    if record is None:
+        return None
+    grid = Grid.from_rows(record["grid"])
+    placed = [tuple(p) for p in record["placed"]]
+    return puzzle_body(req, record["words"], record["clues"], grid, placed, grid_size, record["seed"])
+
+
+async def store_puzzle(body):
+    """Save a body in the puzzle store on a thread (SQLite blocks) and return its ID."""
+    return await asyncio.get_running_loop().run_in_executor(None, puzzle_store.save, body)
+
+
+def puzzle_etag(puzzle_id, fmt):
+    return f'W/"{puzzle_id}.{fmt or "full"}"'
+
+
+async def build_puzzle(req, timer, offload=False, if_none_match=None):
+    """
+    Words, layout and clue positions for one request.
+
+    With an If-None-Match header that matches the stored copy of the puzzle,
+    raises 412 before storing anything: a POST's precondition failing means
+    the request is not carried out.
+
+    Returns:
+        dict: The /generate response body
+    """
+    grid_size = clamp_grid_size(req.grid_size)
+    body = None
+    if archive is not None:
+        with timer.stage("archive"):
+            body = archived_puzzle(req, grid_size)
+    if body is None:
+        body = await generate_puzzle(req, timer, grid_size, offload)
+    with timer.stage("store"):
+        if if_none_match:
+            existing = await asyncio.get_running_loop().run_in_executor(None, puzzle_store.find, body)
+            if existing is not None and etag_matches(if_none_match, puzzle_etag(existing, req.format)):
+                raise HTTPException(status_code=412, detail="This puzzle is already stored; fetch it from /puzzles/{id}")
+        body["puzzle_id"] = await store_puzzle(body)
+    return body
+
+
+async def generate_puzzle(req, timer, grid_size, offload):
+    """Live generation: words from the provider, then the layout engine."""
+    words, clues = await resolve_words(req, timer)
+    time_budget_ms = max(1, min(MAX_TIME_BUDGET_MS, req.time_budget_ms)) if req.time_budget_ms else None
+    starts = min(MAX_STARTS, req.starts) if req.starts else None
+    seed = req.seed if req.seed is not None else random.randrange(2 ** 31)
+    template = req.template
+    if template is not None and not all(2 <= n <= MAX_GRID_SIZE for n in [len(template)] + [len(r) for r in template]):
+        raise HTTPException(status_code=422, detail=f"template rows and columns must number 2 to {MAX_GRID_SIZE}")
+    with timer.stage("layout"):
+        grid, placed_words = await solve_layout(
+            words, clues, grid_size, seed, time_budget_ms, starts, req.max_words, req.min_words,
+            engine=req.engine, template=template, offload=offload, seeded=req.seed is not None,
+        )
+    # a template sets its own size
+    grid_size = max(grid.rows, grid.cols)
+    with timer.stage("display"):
+        return puzzle_body(req, words, clues, grid, placed_words, grid_size, seed)
+
+
+@app.post("/generate")
+async def generate(req: GenerateRequest, request: Request):
+    """
+    The ETag is the puzzle ID (identical puzzles share one). A POST is never
+    answered with 304: If-None-Match matching the puzzle this request produces
+    gives 412 Precondition Failed. Conditional fetches go to GET /puzzles/{id}.
+    """
+    timer = StageTimer()
+    puzzle = await build_puzzle(req, timer, if_none_match=request.headers.get("if-none-match"))
+    with timer.stage("serialize"):
+        response = json_response(request, render(puzzle, req.format), etag=puzzle_etag(puzzle["puzzle_id"], req.format))
+    response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+
+@app.post("/generate/batch")
+async def generate_batch(items: List[GenerateRequest]):
+    """
+    Generate many puzzles at once, streamed back as NDJSON in completion order.
+
+    Every line is {"index", "ok", "puzzle"} or {"index", "ok": false, "error"}, so
+    one failing item doesn't fail the batch. LLM lookups run concurrently (bounded
+    by the LLM pool) and layouts run on the worker pool.
+    """
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+
+    async def run(index, item):
+        try:
+            puzzle = await build_puzzle(item, StageTimer(), offload=True)
+            return {"index": index, "ok": True, "puzzle": render(puzzle, item.format)}
+        except HTTPException as e:
+            return {"index": index, "ok": False, "error": e.detail}
+        except Exception as e:
+            return {"index": index, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    async def lines():
+        tasks = [asyncio.create_task(run(i, item)) for i, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield dumps(await next_done) + b"\n"
+        finally:
+            # client went away: don't keep generating for nobody
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _sse(event, data):
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+@app.post("/generate/stream")
+async def generate_stream(req: GenerateRequest):
+    """
+    /generate as Server-Sent Events.
+
+    Emits `words` once the word list is known, `layout` (a full puzzle body plus
+    its score) every time the exhaustive search finds a better layout, then `done`
+    with the final puzzle, or `error`. The first layout usually arrives within
+    milliseconds while the search keeps going for the time budget.
+
+    The stream always runs the exhaustive search, so options that pick or tune
+    another engine (engine, starts, template, min_words) are rejected with 422.
+    """
+    used = {
+        "engine": req.engine not in (None, "backtrack"),
+        "starts": (req.starts or 1) > 1,
+        "template": req.template is not None,
+        "min_words": req.min_words is not None,
+    }
+    unsupported = [name for name, is_set in used.items() if is_set]
+    if unsupported:
+        raise HTTPException(
+            status_code=422, detail=f"/generate/stream runs the exhaustive search only; not supported: {', '.join(unsupported)}"
+        )
+
+    async def events():
+        timer = StageTimer()
+        try:
+            words, clues = await resolve_words(req, timer)
+        except HTTPException as e:
+            yield _sse("error", {"detail": e.detail})
+            return
+        grid_size = clamp_grid_size(req.grid_size)
+        time_budget_ms = max(1, min(MAX_TIME_BUDGET_MS, req.time_budget_ms or STREAM_TIME_BUDGET_MS))
+        seed = req.seed if req.seed is not None else random.randrange(2 ** 31)
+        yield _sse("words", {"words": words, "clues": clues, "theme": req.theme, "seed": seed})
+
+        # a pinned seed stops on a node count, as in solve_layout
+        node_budget = seeded_node_budget("backtrack", time_budget_ms, words, req.max_words) if req.seed is not None else None
+        key = LayoutCache.key(
+            words, grid_size, "stream", seed, time_budget_ms=time_budget_ms, max_words=req.max_words,
+            node_budget=node_budget,
+        )
+        cached = layout_cache.get(key)
+        if cached is not None:
+            body = puzzle_body(req, words, clues, *cached, grid_size, seed)
+            body["puzzle_id"] = await store_puzzle(body)
+            yield _sse("done", render(body, req.format))
+            return
+
+        # the search runs on the worker pool and reports every better layout back
+        solver_stats = {}
+        layouts = multistart_engine.solve_streaming(
+            words, grid_size=grid_size, seed=seed, time_budget_ms=None if node_budget else time_budget_ms,
+            max_words=req.max_words, stats=solver_stats, node_budget=node_budget,
+        )
+        try:
+            with timer.stage("layout"):
+                async for grid, placed, score in layouts:
+                    if score is not None:
+                        body = puzzle_body(req, words, copy.deepcopy(clues), grid, placed, grid_size, seed)
+                        yield _sse("layout", render(dict(body, score=score), req.format))
+        except Exception as e:
+            yield _sse("error", {"detail": f"Layout search failed: {type(e).__name__}: {e}"})
+            return
+        finally:
+            # stops the search if the client disconnects before it is done
+            await layouts.aclose()
+        record_solver_stats(solver_stats, unplaced=unplaced_count(words, placed))
+        layout_cache.put(key, grid, placed)
+        body = puzzle_body(req, words, clues, grid, placed, grid_size, seed)
+        body["puzzle_id"] = await store_puzzle(body)
+        yield _sse("done", render(body, req.format))
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+class WordEdit(BaseModel):
+    word: str
+    # defaults to the lexicon clue, if the word is in it
+    clue: Optional[str] = None
+
+
+class ClueEdit(BaseModel):
+    clue: str
+
+
+def get_session(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return session
+
+
+def session_response(session, timer, status_code=200):
+    with timer.stage("display"):
+        solver = session.solver
+        body = puzzle_body(
+            session.request, session.words, session.clues, solver.grid, solver.placed, solver.size, session.seed
+        )
+        body["session_id"] = session.id
+    return json_response(
+        None, render(body, session.request.format), status_code=status_code,
+        headers={"Server-Timing": timer.server_timing()},
+    )
+
+
+@app.post("/sessions")
+async def create_session(req: GenerateRequest):
+    """
+    /generate with the greedy solver, kept server-side for editing.
+
+    The response is a /generate body plus `session_id`. Edits reuse the solver's
+    grid and anchor index: adding a word places just that word, removing one just
+    clears its cells, so nothing is re-solved and the LLM isn't asked again.
+    """
+    timer = StageTimer()
+    words, clues = await resolve_words(req, timer)
+    seed = req.seed if req.seed is not None else random.randrange(2 ** 31)
+    with timer.stage("layout"):
+        solver = GreedySolver(
+            words, clues, size=clamp_grid_size(req.grid_size), seed=seed,
+            lexicon=get_lexicon() if req.min_words else None, min_words=req.min_words,
+        )
+        await asyncio.get_running_loop().run_in_executor(None, solver.solve)
+    record_solver_stats(solver.stats, unplaced=len(solver.unplaced))
+    session = sessions.add(PuzzleSession(req, solver, clues, seed))
+    return session_response(session, timer, status_code=201)
+
+
+@app.get("/sessions/{session_id}")
+async def read_session(session_id: str):
+    return session_response(get_session(session_id), StageTimer())
+
+
+@app.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+
+
+@app.post("/sessions/{session_id}/words")
+async def add_session_word(session_id: str, edit: WordEdit):
+    """Place one more word on the session's grid; 422 if it doesn't fit anywhere."""
+    session = get_session(session_id)
+    timer = StageTimer()
+    word = edit.word.strip().upper()
+    if not word:
+        raise HTTPException(status_code=422, detail="Empty word")
+    if word in session.words:
+        raise HTTPException(status_code=409, detail=f"{word} is already in the puzzle")
+    with timer.stage("layout"):
+        placed = session.solver.add_word(word)
+    if not placed:
+        raise HTTPException(status_code=422, detail=f"{word} doesn't fit the current grid")
+    clue = edit.clue or get_lexicon().clue(word) or "Clue for " + word
+    session.clues[word] = {"word": word, "clue": clue}
+    return session_response(session, timer)
+
+
+@app.delete("/sessions/{session_id}/words/{word}")
+async def remove_session_word(session_id: str, word: str):
+    """
+    Take a word out; words that didn't fit before are retried in the freed space.
+    409 if its crossing letters would be left side by side.
+    """
+    session = get_session(session_id)
+    timer = StageTimer()
+    word = word.strip().upper()
+    solver = session.solver
+    with timer.stage("layout"):
+        if word in solver.unplaced:
+            solver.unplaced.remove(word)
+        else:
+            try:
+                removed = solver.remove_word(word)
+            except ValueError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+            if removed is None:
+                raise HTTPException(status_code=404, detail=f"{word} is not in the puzzle")
+    session.clues.pop(word, None)
+    return session_response(session, timer)
+
+
+@app.put("/sessions/{session_id}/clues/{word}")
+async def set_session_clue(session_id: str, word: str, edit: ClueEdit):
+    session = get_session(session_id)
+    word = word.strip().upper()
+    if word not in session.words:
+        raise HTTPException(status_code=404, detail=f"{word} is not in the puzzle")
+    session.clues.setdefault(word, {"word": word})["clue"] = edit.clue
+    return session_response(session, StageTimer())
+
+
+class AnswerCheck(BaseModel):
+    # one string per row; ' ', '.' or '?' for cells not filled in
+    grid: List[str]
+
+
+@app.get("/puzzles/{puzzle_id}")
+async def read_puzzle(puzzle_id: str, request: Request):
+    """The compact playable puzzle: blank mask, numbering and clues, no solution."""
+    body = await asyncio.get_running_loop().run_in_executor(None, puzzle_store.get_json, puzzle_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Unknown puzzle")
+    # a stored puzzle never changes
+    return encoded_response(
+        request, body.encode("utf-8"), etag=f'W/"{puzzle_id}"', headers={"Cache-Control": "public, max-age=86400"}
+    )
+
+
+@app.post("/puzzles/{puzzle_id}/check")
+async def check_puzzle(puzzle_id: str, answers: AnswerCheck):
+    result = await asyncio.get_running_loop().run_in_executor(None, puzzle_store.check, puzzle_id, answers.grid)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown puzzle")
+    return result
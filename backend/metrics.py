@@ -0,0 +1,214 @@
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("crossword.metrics")
+
+# Latency buckets in seconds, from cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join('{}="{}"'.format(n, str(v).replace("\\", "\\\\").replace('"', '\\"')) for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for key, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (f'{bound:g}',))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, key + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Holds the metrics and any callbacks that report values owned elsewhere (e.g. cache stats)."""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """
+        Register a callable returning [(name, type, help, value)] sampled at scrape time.
+        """
+        self.collectors.append(collect)
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            for name, kind, help, value in collect():
+                lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value:g}"])
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "crossword_stage_seconds", "Time spent per /generate stage.", labelnames=("stage",)
+)
+solver_nodes = registry.counter("crossword_solver_nodes_total", "Search nodes explored by the layout solvers.")
+solver_candidates = registry.counter(
+    "crossword_solver_candidates_total", "Candidate placements checked by the layout solvers."
+)
+solver_fallbacks = registry.counter(
+    "crossword_solver_fallback_placements_total", "Words that fell back to random placement."
+)
+words_unplaced = registry.counter("crossword_words_unplaced_total", "Requested words left out of the grid.")
+invalid_layouts = registry.counter(
+    "crossword_invalid_layouts_total", "Responses whose grid has letter runs that aren't placed words."
+)
+
+
+def record_solver_stats(stats, unplaced):
+    solver_nodes.inc(stats.get("nodes", 0))
+    solver_candidates.inc(stats.get("candidates", 0))
+    solver_fallbacks.inc(stats.get("fallbacks", 0))
+    words_unplaced.inc(unplaced)
+
+
+class StageTimer:
+    """
+    Per-request stage timings.
+
+    Every stage is recorded in the crossword_stage_seconds histogram and can be
+    reported back to the client as a Server-Timing header.
+    """
+
+    def __init__(self):
+        self.durations = []  # [(stage, seconds)]
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.durations.append((name, elapsed))
+            stage_seconds.observe(elapsed, stage=name)
+
+    def server_timing(self):
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations)
+
+
+class SlowRequestProfiler:
+    """
+    Opt-in sampling profiler for slow requests.
+
+    A background thread samples the stack of the thread serving the request every
+    `interval` seconds. If the request turns out to take longer than `threshold`
+    seconds, the most frequent stacks are logged; otherwise the samples are dropped.
+    The event loop thread is shared, so samples of concurrent requests can mix.
+    """
+
+    def __init__(self, threshold, interval=0.005, top=10):
+        self.threshold = threshold
+        self.interval = interval
+        self.top = top
+        self._thread_id = threading.get_ident()
+        self._samples = collections.Counter()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+        self._start = time.perf_counter()
+        self._sampler.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None and len(stack) < 30:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{frame.f_lineno}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self._samples[tuple(reversed(stack))] += 1
+
+    def stop(self, label):
+        self._stop.set()
+        self._sampler.join()
+        elapsed = time.perf_counter() - self._start
+        if elapsed < self.threshold:
+            return
+        total = sum(self._samples.values())
+        lines = [f"slow request {label}: {elapsed * 1000:.0f}ms, {total} samples"]
+        for stack, count in self._samples.most_common(self.top):
+            lines.append(f"  {count:4d} {' > '.join(stack[-8:])}")
+        logger.warning("\n".join(lines))
+
+
+PROFILE_SLOW_MS = float(os.getenv("CROSSWORD_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("CROSSWORD_PROFILE_INTERVAL_MS", "5"))
+
+
+def start_profiler():
+    """A SlowRequestProfiler when CROSSWORD_PROFILE_SLOW_MS is set, else None."""
+    if PROFILE_SLOW_MS <= 0:
+        return None
+    return SlowRequestProfiler(PROFILE_SLOW_MS / 1000, interval=PROFILE_INTERVAL_MS / 1000)
@@ -0,0 +1,84 @@
+"""
+Minimal OpenAI-compatible chat endpoint for offline and load testing.
+
+Answers both the single-theme prompt of get_words_by_theme and the batch prompt
+of word_batcher with random words from the lexicon. Knobs (environment):
+
+    MOCK_LLM_LATENCY_MS   delay per call (default 200)
+    MOCK_LLM_DROP_RATE    chance that a request is left out of a batch answer
+    MOCK_LLM_FAIL_RATE    chance that a call fails with HTTP 500
+
+    uvicorn mock_llm_server:app --port 8001
+    WORD_PROVIDER=openai-compatible LLM_BASE_URL=http://localhost:8001/v1 uvicorn main:app
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from lexicon import get_lexicon
+
+LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", "200"))
+DROP_RATE = float(os.getenv("MOCK_LLM_DROP_RATE", "0"))
+FAIL_RATE = float(os.getenv("MOCK_LLM_FAIL_RATE", "0"))
+
+app = FastAPI()
+stats = {"calls": 0, "requests": 0, "dropped": 0, "failed": 0}
+_pool = []
+
+
+def _words(count):
+    lexicon = get_lexicon()
+    if not _pool:
+        _pool.extend(w for length, group in lexicon.by_length.items() if 3 <= length <= 9 for w in group)
+    return [
+        {"word": word.lower(), "clue": lexicon.clue(word) or f"Omschrijving van {word.lower()}"}
+        for word in random.sample(_pool, min(count, len(_pool)))
+    ]
+
+
+def _completion(model, content):
+    return {
+        "id": f"chatcmpl-mock-{stats['calls']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    stats["calls"] += 1
+    await asyncio.sleep(LATENCY_MS / 1000)
+    if random.random() < FAIL_RATE:
+        stats["failed"] += 1
+        return JSONResponse({"error": {"message": "mock failure", "type": "server_error"}}, status_code=500)
+
+    prompt = body["messages"][-1]["content"]
+    batch = re.search(r"^Requests: (.*)$", prompt, re.MULTILINE)
+    if batch:
+        results = []
+        for request in json.loads(batch.group(1)):
+            stats["requests"] += 1
+            if random.random() < DROP_RATE:
+                stats["dropped"] += 1
+                continue
+            results.append({"id": request["id"], "words": _words(int(request["count"]))})
+        content = json.dumps({"results": results}, ensure_ascii=False)
+    else:
+        stats["requests"] += 1
+        count = re.search(r"generate (\d+)", prompt)
+        content = json.dumps(_words(int(count.group(1)) if count else 10), ensure_ascii=False)
+    return _completion(body.get("model", "mock"), content)
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
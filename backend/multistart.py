@@ -0,0 +1,296 @@
+import asyncio
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import crossword_csp
+import crossword_generator
+import crossword_generator_new
+from lexicon import get_lexicon
+from validator import check_layout
+
+
+def variant_plan(words, seed, index):
+    """
+    Word order and first-word orientation for one start.
+
+    Start 0 is the solvers' own plan (longest first, horizontal). The others
+    shuffle words of similar length, pick the first word among the longest
+    three and flip a coin for its direction.
+
+    Returns:
+        order (list[str]), first_direction (str)
+    """
+    order = sorted((w.upper() for w in words), key=len, reverse=True)
+    if index == 0:
+        return order, "H"
+    rng = random.Random(seed)
+    order.sort(key=lambda w: len(w) + rng.uniform(0, 2.5), reverse=True)
+    first = rng.randrange(min(3, len(order)))
+    order.insert(0, order.pop(first))
+    return order, rng.choice(["H", "V"])
+
+
+def solve_variant(words, grid_size, engine, seed, index, deadline=None, node_budget=None):
+    """
+    Run one seeded start. Executed in a worker process.
+
+    A backtracking start searches until `deadline`, a time.time() value shared by
+    every start of the request, so a start that waited for a free worker only
+    gets the time that is left, and one that gets none is skipped (start 0
+    always runs, so the request has a layout). With a node_budget instead it
+    stops after that many search nodes, which doesn't depend on machine load.
+
+    Returns:
+        dict with seed, index, grid, placed, crossings and the solver's stats,
+        or None for a skipped start
+    """
+    remaining_ms = (deadline - time.time()) * 1000 if deadline is not None else None
+    if remaining_ms is not None and remaining_ms <= 0 and index > 0:
+        return None
+    order, first_direction = variant_plan(words, seed, index)
+    if engine == "backtrack":
+        # at least a millisecond: the solver always finishes its first complete layout anyway
+        time_budget_ms = max(1, remaining_ms) if remaining_ms is not None else None
+        solver = crossword_generator.CrosswordSolver(
+            order, {}, size=grid_size, time_budget_ms=time_budget_ms, node_budget=node_budget,
+            first_direction=first_direction, seed=seed,
+        )
+        grid, placed, _ = solver.solve()
+    else:
+        solver = crossword_generator_new.CrosswordSolver(
+            order, {}, size=grid_size, presorted=True, first_direction=first_direction, seed=seed
+        )
+        grid, placed = solver.solve()
+    return {
+        "seed": seed, "index": index, "grid": grid, "placed": placed,
+        "crossings": check_layout(grid, placed)["crossings"], "stats": solver.stats,
+    }
+
+
+def solve_single(words, grid_size, engine, seed, time_budget_ms=None, max_words=None, min_words=None, template=None,
+                 node_budget=None):
+    """
+    One plain solve of the given word order (no variants). Executed in a worker process.
+
+    Returns:
+        grid (Grid), placed (list[tuple]), stats (dict)
+    """
+    stats = {}
+    if engine == "backtrack":
+        grid, placed = crossword_generator.create_crossword(
+            words, {}, grid_size=grid_size, time_budget_ms=time_budget_ms, max_words=max_words, stats=stats, seed=seed,
+            node_budget=node_budget,
+        )
+    elif engine == "csp":
+        grid, placed = crossword_csp.create_crossword(
+            words, {}, grid_size=grid_size, template=template, seed=seed, time_budget_ms=time_budget_ms, stats=stats,
+            node_budget=node_budget,
+        )
+    else:
+        grid, placed = crossword_generator_new.create_crossword(
+            words, {}, grid_size=grid_size, stats=stats, seed=seed,
+            lexicon=get_lexicon() if min_words else None, min_words=min_words,
+        )
+    return grid, placed, stats
+
+
+def solve_streaming(words, grid_size, seed, time_budget_ms, max_words, progress, cancel, node_budget=None):
+    """
+    Exhaustive solve that puts every better layout on `progress` as (grid, placed,
+    score) and stops early once `cancel` is set. None on `progress` marks the end.
+    Executed in a worker process.
+
+    Returns:
+        grid (Grid), placed (list[tuple]), stats (dict)
+    """
+    solver = crossword_generator.CrosswordSolver(
+        words, {}, size=grid_size, time_budget_ms=time_budget_ms, node_budget=node_budget, max_words=max_words, seed=seed,
+        on_improve=lambda grid, placed, score: progress.put((grid, placed, score)),
+    )
+
+    def stop_when_cancelled():
+        cancel.wait()
+        solver.timed_out = True
+
+    threading.Thread(target=stop_when_cancelled, daemon=True).start()
+    try:
+        grid, placed, _ = solver.solve()
+    finally:
+        progress.put(None)
+        cancel.set()  # lets the watcher thread finish
+    return grid, placed, solver.stats
+
+
+def pick_best(results, stats=None):
+    """
+    Most placed words, then most crossings; ties go to the earliest start.
+
+    Skipped starts (None) are left out. When `stats` is given it receives the
+    work counters summed over all starts.
+    """
+    results = [r for r in results if r is not None]
+    if stats is not None:
+        for result in results:
+            for name, value in result["stats"].items():
+                stats[name] = stats.get(name, 0) + value
+    return max(results, key=lambda r: (len(r["placed"]), r["crossings"], -r["index"]))
+
+
+class MultiStartEngine:
+    """
+    Runs several seeded starts of a layout engine on a process pool and keeps the best.
+
+    The pool is created on first use and stays up between requests, so workers are
+    already forked and have the solver modules imported when a request comes in.
+    If a worker dies the pool is broken for good; it is then replaced and the
+    solve tried once more.
+    """
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers (int | None): Worker processes, defaults to the number of cores
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._manager = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    @property
+    def manager(self):
+        """Serves the queues and events streaming solves report through."""
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        return self._manager
+
+    def warm(self):
+        """Start every worker process ahead of the first request."""
+        for future in [self.pool.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def _replace_pool(self, pool):
+        """Drop a broken pool (unless another caller already did), so the next use starts a new one."""
+        if self._pool is pool:
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        """fn(*args) on the pool, retried once on a fresh pool if the current one is broken."""
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+        return await loop.run_in_executor(self.pool, fn, *args)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def _jobs(self, words, grid_size, starts, engine, seed, time_budget_ms, node_budget=None):
+        base = random.randrange(2 ** 31) if seed is None else seed
+        starts = max(1, starts)
+        # one deadline / node budget for the whole request, so more starts don't mean a longer request
+        deadline = time.time() + time_budget_ms / 1000 if time_budget_ms else None
+        per_start = max(1, node_budget // starts) if node_budget else None
+        return [(words, grid_size, engine, base + i, i, deadline, per_start) for i in range(starts)]
+
+    def solve(self, words, grid_size=15, starts=8, engine="greedy", seed=None, time_budget_ms=None, stats=None,
+              node_budget=None):
+        """
+        Blocking multi-start solve. With the backtracking engine, time_budget_ms
+        (or node_budget, split over the starts) bounds the whole solve rather
+        than each start.
+
+        Returns:
+            grid (Grid), placed (list[tuple])
+        """
+        jobs = self._jobs(words, grid_size, starts, engine, seed, time_budget_ms, node_budget)
+        pool = self.pool
+        try:
+            results = [future.result() for future in [pool.submit(solve_variant, *job) for job in jobs]]
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            results = [future.result() for future in [self.pool.submit(solve_variant, *job) for job in jobs]]
+        best = pick_best(results, stats)
+        return best["grid"], best["placed"]
+
+    async def solve_async(self, words, grid_size=15, starts=8, engine="greedy", seed=None, time_budget_ms=None,
+                          stats=None, node_budget=None):
+        """Same as solve, awaiting the workers instead of blocking the event loop."""
+        jobs = self._jobs(words, grid_size, starts, engine, seed, time_budget_ms, node_budget)
+        results = await asyncio.gather(*(self._run(solve_variant, *job) for job in jobs))
+        best = pick_best(results, stats)
+        return best["grid"], best["placed"]
+
+    async def solve_single_async(self, words, grid_size=15, engine="greedy", seed=None, time_budget_ms=None,
+                                 max_words=None, min_words=None, template=None, stats=None, node_budget=None):
+        """Run one plain solve on the pool, keeping the event loop free."""
+        grid, placed, worker_stats = await self._run(
+            solve_single, words, grid_size, engine, seed, time_budget_ms, max_words, min_words, template, node_budget
+        )
+        if stats is not None:
+            stats.update(worker_stats)
+        return grid, placed
+
+    async def solve_streaming(self, words, grid_size=15, seed=None, time_budget_ms=None, max_words=None, stats=None,
+                              node_budget=None):
+        """
+        Exhaustive solve on the pool that reports layouts as it finds them.
+
+        Yields (grid, placed, score) for every better layout, then the final
+        (grid, placed, None). Closing the generator early stops the search. A
+        broken pool is replaced and the search started again, unless it had
+        already reported a layout.
+        """
+        loop = asyncio.get_running_loop()
+        progress, cancel = self.manager.Queue(), self.manager.Event()
+        args = (words, grid_size, seed, time_budget_ms, max_words, progress, cancel, node_budget)
+        reported = False
+        try:
+            for attempt in range(2):
+                pool = self.pool
+                try:
+                    future = loop.run_in_executor(pool, solve_streaming, *args)
+                    while True:
+                        getter = loop.run_in_executor(None, progress.get)
+                        await asyncio.wait({getter, future}, return_when=asyncio.FIRST_COMPLETED)
+                        if not getter.done() and future.exception() is not None:
+                            # the worker died before its end marker: release the reader ourselves
+                            progress.put(None)
+                            await getter
+                            break
+                        improvement = await getter
+                        if improvement is None:
+                            break
+                        reported = True
+                        yield improvement
+                    grid, placed, worker_stats = await future
+                    break
+                except BrokenProcessPool:
+                    self._replace_pool(pool)
+                    if attempt or reported:
+                        raise
+        finally:
+            cancel.set()
+        if stats is not None:
+            stats.update(worker_stats)
+        yield grid, placed, None
+
+
+default_engine = MultiStartEngine(workers=int(os.getenv("MULTISTART_WORKERS", "0")) or None)
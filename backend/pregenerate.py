@@ -0,0 +1,128 @@
+"""
+Pre-generate puzzles for popular themes into an archive main.py can serve from.
+
+Themes are read one per line (blank lines and # comments are skipped). For every
+theme a few word lists are fetched through the word provider (and its cache), then
+every (theme, grid size, seed) layout is solved on the multistart process pool,
+so all cores are busy. Layouts that leave too many words out are skipped.
+The backtracking engine is exhaustive, so without --time-budget-ms it stops after
+--node-budget search nodes per puzzle (default 20000).
+
+    python pregenerate.py themes.txt --per-theme 50 --output puzzles.cwa
+    CROSSWORD_ARCHIVE=puzzles.cwa uvicorn main:app
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from ai_word_generator import get_words_by_theme_async
+from multistart import MultiStartEngine
+from puzzle_archive import ArchiveWriter
+
+# Search nodes per backtracking puzzle when no budget is given, about a second with 10 words
+DEFAULT_NODE_BUDGET = 20000
+
+
+def read_themes(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+async def word_lists(theme, count, num_words):
+    """`count` word lists for a theme, fetched one after another (concurrent calls for one theme are merged)."""
+    lists = []
+    for _ in range(count):
+        lists.append(await get_words_by_theme_async(theme, num_words=num_words))
+    return lists
+
+
+async def layout(engine, words, grid_size, seed, args):
+    if args.starts > 1:
+        return await engine.solve_async(
+            words, grid_size=grid_size, starts=args.starts, engine=args.engine, seed=seed,
+            time_budget_ms=args.time_budget_ms, node_budget=args.node_budget,
+        )
+    return await engine.solve_single_async(
+        words, grid_size=grid_size, engine=args.engine, seed=seed, time_budget_ms=args.time_budget_ms,
+        node_budget=args.node_budget,
+    )
+
+
+async def pregenerate(args):
+    themes = read_themes(args.themes)
+    engine = MultiStartEngine(workers=args.workers)
+    rng = random.Random(args.seed)
+    counts = {"written": 0, "skipped": 0, "failed_themes": 0}
+
+    fetched = await asyncio.gather(
+        *(word_lists(theme, args.word_lists, args.num_words) for theme in themes), return_exceptions=True
+    )
+    jobs = []
+    for theme, lists in zip(themes, fetched):
+        if isinstance(lists, Exception):
+            print(f"{theme}: word provider failed: {lists}", file=sys.stderr)
+            counts["failed_themes"] += 1
+            continue
+        for grid_size in args.grid_sizes:
+            for i in range(args.per_theme):
+                words, clues = lists[i % len(lists)]
+                jobs.append((theme, grid_size, rng.randrange(2 ** 31), sorted(words, key=lambda w: (-len(w), w)), clues))
+
+    async def run(job):
+        theme, grid_size, seed, words, clues = job
+        grid, placed = await layout(engine, words, grid_size, seed, args)
+        return job, grid, placed
+
+    try:
+        with ArchiveWriter(args.output) as archive:
+            for done in asyncio.as_completed([run(job) for job in jobs]):
+                (theme, grid_size, seed, words, clues), grid, placed = await done
+                if len(placed) < args.min_placed_ratio * len(words):
+                    counts["skipped"] += 1
+                    continue
+                archive.add({
+                    "theme": theme, "grid_size": grid_size, "seed": seed, "words": words, "clues": clues,
+                    "grid": list(grid), "placed": [list(p) for p in placed],
+                })
+                counts["written"] += 1
+    finally:
+        engine.shutdown()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("themes", help="file with one theme per line")
+    parser.add_argument("--output", required=True, help="archive file to write")
+    parser.add_argument("--per-theme", type=int, default=20, help="puzzles per theme and grid size")
+    parser.add_argument("--grid-sizes", nargs="+", type=int, default=[15])
+    parser.add_argument("--word-lists", type=int, default=3, help="word lists fetched per theme")
+    parser.add_argument("--num-words", type=int, default=10)
+    parser.add_argument("--engine", choices=["greedy", "backtrack"], default="greedy")
+    parser.add_argument("--starts", type=int, default=8, help="seeded starts per puzzle, best one kept")
+    parser.add_argument("--time-budget-ms", type=int, default=None, help="budget for the backtracking engine")
+    parser.add_argument(
+        "--node-budget", type=int, default=None,
+        help=f"search nodes per puzzle for the backtracking engine (default without --time-budget-ms: {DEFAULT_NODE_BUDGET})",
+    )
+    parser.add_argument("--min-placed-ratio", type=float, default=0.8)
+    parser.add_argument("--workers", type=int, default=None, help="layout processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    if args.engine == "backtrack" and args.time_budget_ms is None and args.node_budget is None:
+        args.node_budget = DEFAULT_NODE_BUDGET
+
+    start = time.perf_counter()
+    counts = asyncio.run(pregenerate(args))
+    print(
+        f"{counts['written']} puzzles written to {args.output} ({counts['skipped']} skipped, "
+        f"{counts['failed_themes']} themes failed) in {time.perf_counter() - start:.1f}s",
+        file=sys.stderr,
+    )
+    return 0 if counts["written"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
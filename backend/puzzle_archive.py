@@ -0,0 +1,122 @@
+"""
+Append-only archive of pre-generated puzzles, read through mmap.
+
+Layout of the file:
+
+    b"CWA1"
+    records     4-byte big-endian length + UTF-8 JSON, one per puzzle
+    index       UTF-8 JSON {"<theme>|<grid size>": [record offset, ...]}
+    footer      8-byte big-endian index offset + b"CWIX"
+
+The reader only parses the index; a record is read (and decoded) when it is
+served, so opening a large archive is cheap and serving one is constant time.
+"""
+import json
+import mmap
+import random
+import struct
+import threading
+
+from word_cache import normalize_theme
+
+MAGIC = b"CWA1"
+INDEX_MAGIC = b"CWIX"
+_LENGTH = struct.Struct(">I")
+_FOOTER = struct.Struct(">Q4s")
+
+
+def archive_key(theme, grid_size):
+    return f"{normalize_theme(theme)}|{int(grid_size)}"
+
+
+class ArchiveWriter:
+    """
+    Writes an archive; use as a context manager so the index is written on exit.
+
+    Records are dicts with theme, grid_size, seed, words, clues, grid (row strings)
+    and placed (word, row, col, direction).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._index = {}
+        self.count = 0
+
+    def add(self, record):
+        data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        offset = self._file.tell()
+        self._file.write(_LENGTH.pack(len(data)))
+        self._file.write(data)
+        self._index.setdefault(archive_key(record["theme"], record["grid_size"]), []).append(offset)
+        self.count += 1
+
+    def close(self):
+        index_offset = self._file.tell()
+        self._file.write(json.dumps(self._index, ensure_ascii=False).encode("utf-8"))
+        self._file.write(_FOOTER.pack(index_offset, INDEX_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PuzzleArchive:
+    """
+    Serves archived puzzles, each at most once per process.
+
+    Per (theme, grid size) the record offsets are shuffled once at open time and
+    handed out from the end of the list, so picking a random unused puzzle is a
+    pop plus one record decode. When a key runs out, take() returns None and the
+    caller generates live.
+    """
+
+    def __init__(self, path, seed=None):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a puzzle archive")
+        index_offset, magic = _FOOTER.unpack(self._map[-_FOOTER.size:])
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} has no index (interrupted write?)")
+        index = json.loads(self._map[index_offset:len(self._map) - _FOOTER.size].decode("utf-8"))
+        rng = random.Random(seed)
+        self._unused = {}
+        for key, offsets in index.items():
+            rng.shuffle(offsets)
+            self._unused[key] = offsets
+        self.stats = {"served": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self._unused.values())
+
+    def _read(self, offset):
+        (length,) = _LENGTH.unpack(self._map[offset:offset + _LENGTH.size])
+        start = offset + _LENGTH.size
+        return json.loads(self._map[start:start + length].decode("utf-8"))
+
+    def take(self, theme, grid_size):
+        """
+        A random puzzle for the theme and grid size that hasn't been served yet.
+
+        Returns:
+            dict | None: The archived record
+        """
+        with self._lock:
+            offsets = self._unused.get(archive_key(theme, grid_size))
+            if not offsets:
+                self.stats["misses"] += 1
+                return None
+            offset = offsets.pop()
+            self.stats["served"] += 1
+        return self._read(offset)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
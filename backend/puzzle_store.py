@@ -0,0 +1,259 @@
+import hashlib
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+BLOCK = "#"
+OPEN = "."
+
+
+def number_entries(placed):
+    """
+    Crossword numbering for placed words: every cell where a word starts gets a
+    number, in reading order (top to bottom, left to right).
+
+    Returns:
+        across (list[dict]), down (list[dict]) with number, word, row, col, length
+    """
+    starts = sorted({(row, col) for _, row, col, _ in placed})
+    numbers = {cell: n for n, cell in enumerate(starts, start=1)}
+    across, down = [], []
+    for word, row, col, direction in placed:
+        entry = {"number": numbers[(row, col)], "word": word, "row": row, "col": col, "length": len(word)}
+        (down if direction == "V" else across).append(entry)
+    across.sort(key=lambda e: e["number"])
+    down.sort(key=lambda e: e["number"])
+    return across, down
+
+
+def layout_hash(body):
+    """
+    Hash of everything a /generate body shows except its puzzle ID: grid, placed
+    words, requested words, clues, theme and seed.
+    """
+    data = json.dumps(
+        [body["grid"], body["placed_words"], body.get("words_requested"),
+         {word: entry.get("clue", "") for word, entry in body["clues"].items()}, body.get("theme"), body.get("seed")],
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def compact_puzzle(puzzle_id, body):
+    """
+    The playable form of a /generate body: the blank mask, numbering and clues,
+    without the solution.
+
+    Returns:
+        dict: id, rows, cols, mask (row strings, '#' block / '.' open), across and
+        down (number, row, col, length, clue), theme, seed
+    """
+    grid = body["grid"]
+    across, down = number_entries(body["placed_words"])
+    clues = body["clues"]
+
+    def strip(entries):
+        return [
+            dict({k: e[k] for k in ("number", "row", "col", "length")}, clue=clues.get(e["word"], {}).get("clue", ""))
+            for e in entries
+        ]
+
+    return {
+        "id": puzzle_id,
+        "rows": len(grid),
+        "cols": len(grid[0]) if grid else 0,
+        "mask": ["".join(OPEN if cell else BLOCK for cell in row) for row in grid],
+        "across": strip(across),
+        "down": strip(down),
+        "theme": body.get("theme"),
+        "seed": body.get("seed"),
+    }
+
+
+class PuzzleStore:
+    """
+    Generated puzzles by short ID, for serving and answer checking.
+
+    Every puzzle is written once to SQLite (solution plus its compact form) and
+    never changes, so the in-process LRU keeps recently used ones with their
+    compact JSON already serialized: a popular puzzle is a dict lookup.
+    Saving a puzzle identical to a stored one (same layout_hash) returns the
+    existing ID, so repeated seeded requests get the same ID and ETag.
+    Puzzles older than `ttl` are deleted, and beyond `max_rows` the oldest go first.
+    """
+
+    def __init__(self, path=None, max_memory=1024, id_bytes=6, max_rows=100000, ttl=30 * 24 * 3600):
+        """
+        Args:
+            path (str | None): SQLite file, or None for an in-memory database
+            max_memory (int): Puzzles kept in the in-process LRU
+            id_bytes (int): Random bytes per ID (6 bytes = 8 URL-safe characters)
+            max_rows (int): Puzzles kept in the database before the oldest are deleted
+            ttl (float | None): Seconds a puzzle is kept; None keeps it until max_rows pushes it out
+        """
+        self.max_memory = max_memory
+        self.id_bytes = id_bytes
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.stats = {"saved": 0, "duplicates": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evicted": 0}
+        self._memory = OrderedDict()  # id -> {"solution": [str], "compact": dict, "json": str}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        if path:
+            # appends only: WAL keeps readers off the writer's lock and skips most fsyncs
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS puzzles ("
+            " id TEXT PRIMARY KEY, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS puzzle_hashes (hash TEXT PRIMARY KEY, id TEXT NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS puzzles_created_at ON puzzles (created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS puzzle_hashes_id ON puzzle_hashes (id)")
+        self._db.commit()
+        (self._rows,) = self._db.execute("SELECT COUNT(*) FROM puzzles").fetchone()
+
+    def _remember(self, puzzle_id, record):
+        record["json"] = json.dumps(record["compact"], ensure_ascii=False)
+        self._memory[puzzle_id] = record
+        self._memory.move_to_end(puzzle_id)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+        return record
+
+    def find(self, body):
+        """The ID of a stored puzzle identical to this /generate body, or None."""
+        digest = layout_hash(body)
+        with self._lock:
+            row = self._db.execute("SELECT id FROM puzzle_hashes WHERE hash = ?", (digest,)).fetchone()
+        return row[0] if row is not None else None
+
+    def save(self, body):
+        """
+        Store a /generate body.
+
+        Returns:
+            str: The new puzzle ID, or the ID of an identical stored puzzle
+        """
+        digest = layout_hash(body)
+        solution = ["".join(cell or " " for cell in row) for row in body["grid"]]
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT id FROM puzzle_hashes WHERE hash = ?", (digest,)).fetchone()
+            if row is not None:
+                self.stats["duplicates"] += 1
+                return row[0]
+            while True:
+                puzzle_id = secrets.token_urlsafe(self.id_bytes)
+                if puzzle_id in self._memory:
+                    continue
+                compact = compact_puzzle(puzzle_id, body)
+                payload = json.dumps({"solution": solution, "compact": compact}, ensure_ascii=False)
+                try:
+                    self._db.execute(
+                        "INSERT INTO puzzles (id, payload, created_at) VALUES (?, ?, ?)",
+                        (puzzle_id, payload, now),
+                    )
+                except sqlite3.IntegrityError:
+                    continue
+                self._db.execute("INSERT INTO puzzle_hashes (hash, id) VALUES (?, ?)", (digest, puzzle_id))
+                self._rows += 1
+                self._evict(now)
+                self._db.commit()
+                break
+            self._remember(puzzle_id, {"solution": solution, "compact": compact})
+            self.stats["saved"] += 1
+        return puzzle_id
+
+    def _evict(self, now):
+        """Delete puzzles past the TTL, then the oldest ones beyond max_rows (lock held)."""
+        db = self._db
+        cutoff = now - self.ttl if self.ttl is not None else 0
+        ids = [row[0] for row in db.execute("SELECT id FROM puzzles WHERE created_at <= ?", (cutoff,))]
+        excess = self._rows - len(ids) - self.max_rows
+        if excess > 0:
+            ids += [row[0] for row in db.execute(
+                "SELECT id FROM puzzles WHERE created_at > ? ORDER BY created_at LIMIT ?", (cutoff, excess)
+            )]
+        if not ids:
+            return
+        db.executemany("DELETE FROM puzzles WHERE id = ?", [(i,) for i in ids])
+        db.executemany("DELETE FROM puzzle_hashes WHERE id = ?", [(i,) for i in ids])
+        for puzzle_id in ids:
+            self._memory.pop(puzzle_id, None)
+        self._rows -= len(ids)
+        self.stats["evicted"] += len(ids)
+
+    def _record(self, puzzle_id):
+        with self._lock:
+            record = self._memory.get(puzzle_id)
+            if record is not None:
+                self._memory.move_to_end(puzzle_id)
+                self.stats["memory_hits"] += 1
+                return record
+            row = self._db.execute("SELECT payload FROM puzzles WHERE id = ?", (puzzle_id,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            return self._remember(puzzle_id, json.loads(row[0]))
+
+    def get_json(self, puzzle_id):
+        """The compact puzzle as serialized JSON, or None for an unknown ID."""
+        record = self._record(puzzle_id)
+        return record["json"] if record is not None else None
+
+    def check(self, puzzle_id, answers):
+        """
+        Compare a (partly) filled grid with the solution.
+
+        Args:
+            puzzle_id (str): Puzzle ID
+            answers (list[str]): One string per row; ' ', '.', '?' or a missing
+                cell means not filled in
+
+        Returns:
+            dict | None: solved, filled, total, wrong ([row, col] of filled cells
+            that don't match) and correct ({"across": [n], "down": [n]} of fully
+            correct words); None for an unknown ID
+        """
+        record = self._record(puzzle_id)
+        if record is None:
+            return None
+        solution = record["solution"]
+        wrong = []
+        filled = total = 0
+        for r, row in enumerate(solution):
+            given = answers[r].upper() if r < len(answers) else ""
+            for c, want in enumerate(row):
+                if want == " ":
+                    continue
+                total += 1
+                have = given[c] if c < len(given) else " "
+                if have in " .?":
+                    continue
+                filled += 1
+                if have != want:
+                    wrong.append([r, c])
+
+        def correct(entries, direction):
+            done = []
+            for e in entries:
+                cells = [(e["row"] + i, e["col"]) if direction == "V" else (e["row"], e["col"] + i)
+                         for i in range(e["length"])]
+                if all(r < len(answers) and c < len(answers[r]) and answers[r][c].upper() == solution[r][c]
+                       for r, c in cells):
+                    done.append(e["number"])
+            return done
+
+        compact = record["compact"]
+        return {
+            "solved": filled == total and not wrong,
+            "filled": filled,
+            "total": total,
+            "wrong": wrong,
+            "correct": {"across": correct(compact["across"], "H"), "down": correct(compact["down"], "V")},
+        }
@@ -0,0 +1,132 @@
+"""
+Response encoding: the compact puzzle format, fast JSON, compression and ETags.
+
+orjson and brotli are optional; without them responses use the standard JSON
+encoder and gzip only.
+"""
+import gzip
+import json
+
+from fastapi.responses import Response
+
+from puzzle_store import number_entries
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as they are; compressing them saves less than a packet
+MIN_COMPRESS_SIZE = 512
+# Keys a compact body copies from the full one when present
+_PASSTHROUGH = ("puzzle_id", "session_id", "theme", "seed", "grid_size", "words_requested", "quality", "score")
+
+
+def dumps(obj):
+    """Serialize to UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def compact_body(body):
+    """
+    The compact form of a /generate body.
+
+    The grid becomes one string per row with '.' for empty cells, and the placed
+    words, their clues and positions become one numbered slot table, so nothing
+    is sent twice.
+
+    Returns:
+        dict: rows, slots (number, direction "across"/"down", row, col, word, clue)
+        and the body's puzzle_id, theme, seed, grid_size, words_requested, quality
+    """
+    across, down = number_entries(body["placed_words"])
+    clues = body["clues"]
+    slots = [
+        {
+            "number": e["number"], "direction": direction, "row": e["row"], "col": e["col"],
+            "word": e["word"], "clue": clues.get(e["word"], {}).get("clue", ""),
+        }
+        for direction, entries in (("across", across), ("down", down))
+        for e in entries
+    ]
+    slots.sort(key=lambda s: (s["number"], s["direction"]))
+    compact = {"rows": ["".join(cell or "." for cell in row) for row in body["grid"]], "slots": slots}
+    for key in _PASSTHROUGH:
+        if key in body:
+            compact[key] = body[key]
+    return compact
+
+
+def render(body, fmt=None):
+    """The body in the requested format ("full", the default, or "compact")."""
+    return compact_body(body) if fmt == "compact" else body
+
+
+def _accepted(header, coding):
+    """True if an Accept-Encoding header allows `coding` (q > 0)."""
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() not in (coding, "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _opaque(tag):
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(header, etag):
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if header.strip() == "*":
+        return True
+    return any(_opaque(tag) == _opaque(etag) for tag in header.split(","))
+
+
+def encoded_response(request, data, etag=None, status_code=200, headers=None, media_type="application/json"):
+    """
+    A response for already serialized bytes.
+
+    With a request: 304 if it is a GET or HEAD whose If-None-Match matches `etag`,
+    otherwise the body compressed with brotli or gzip as Accept-Encoding allows.
+    Without a request the body is sent as is. Other methods check their
+    preconditions before they act (see etag_matches).
+    """
+    headers = dict(headers or {})
+    if etag is not None:
+        headers["ETag"] = etag
+    if request is None:
+        return Response(content=data, status_code=status_code, headers=headers, media_type=media_type)
+
+    headers["Vary"] = "Accept-Encoding"
+    conditional = request.method in ("GET", "HEAD")
+    if etag is not None and conditional and etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    if len(data) >= MIN_COMPRESS_SIZE:
+        accept = request.headers.get("accept-encoding", "")
+        if brotli is not None and _accepted(accept, "br"):
+            data = brotli.compress(data, quality=5)
+            headers["Content-Encoding"] = "br"
+        elif _accepted(accept, "gzip"):
+            data = gzip.compress(data, compresslevel=5, mtime=0)
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=data, status_code=status_code, headers=headers, media_type=media_type)
+
+
+def json_response(request, obj, etag=None, status_code=200, headers=None):
+    """encoded_response() for an object, serialized with dumps()."""
+    return encoded_response(request, dumps(obj), etag=etag, status_code=status_code, headers=headers)
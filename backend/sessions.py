@@ -0,0 +1,76 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class PuzzleSession:
+    """
+    A puzzle being edited: the request it came from, its clues and the live greedy
+    solver (grid, placed words, anchor index), so edits only touch what changed.
+    """
+
+    def __init__(self, request, solver, clues, seed):
+        self.id = secrets.token_urlsafe(12)
+        self.request = request
+        self.solver = solver
+        self.clues = clues
+        self.seed = seed
+        self.updated = time.monotonic()
+
+    @property
+    def words(self):
+        """Words in the puzzle: placed ones and those still waiting for room."""
+        return [w for w, _, _, _ in self.solver.placed] + list(self.solver.unplaced)
+
+
+class SessionStore:
+    """
+    In-memory puzzle sessions, least recently used first out.
+
+    Sessions expire `ttl` seconds after their last use; at most `max_sessions`
+    are kept. State lives in this process only, so run a single worker (or
+    sticky routing) when editing is used.
+    """
+
+    def __init__(self, max_sessions=1000, ttl=3600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _expire(self, now):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.updated <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+    def add(self, session):
+        with self._lock:
+            self._expire(time.monotonic())
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        """
+        Returns:
+            PuzzleSession | None (unknown or expired)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.updated = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
@@ -0,0 +1,103 @@
+import re
+
+from grid import Grid
+
+# Two or more consecutive letters (empty cells are 0 bytes)
+_RUN = re.compile(rb"[^\x00]{2,}")
+
+
+def placement_is_clean(grid, word, row, col, direction):
+    """
+    True if the word can go at (row, col) without creating letter runs that aren't words.
+
+    On top of bounds and letter conflicts this rejects a word that touches a letter
+    right before or after it, runs alongside another word, or overlaps a word going
+    the same way. Every engine checks its candidates with this, so a layout built
+    only from clean placements passes check_layout.
+
+    Args:
+        grid (Grid): Current grid
+        word (str): Word to place
+        row (int): Starting row
+        col (int): Starting column
+        direction (str): 'H' or 'V'
+    """
+    n = len(word)
+    return (grid.fits(word, row, col, direction)
+            and grid.ends_clear(row, col, direction, n)
+            and grid.sides_clear(row, col, direction, n)
+            and grid.crossings_apart(row, col, direction, n))
+
+
+def letter_runs(grid, rows=None, cols=None):
+    """
+    Every horizontal and vertical run of two or more letters.
+
+    Rows are contiguous slices of the cell array and columns strided ones, so each
+    line is scanned once by the regex engine.
+
+    Args:
+        grid (Grid): The grid
+        rows (iterable[int] | None): Only scan these rows (default: all)
+        cols (iterable[int] | None): Only scan these columns (default: all)
+
+    Returns:
+        list[tuple]: (text, row, col, direction)
+    """
+    cells = bytes(grid.cells)
+    width = grid.cols
+    runs = []
+    for r in range(grid.rows) if rows is None else rows:
+        for m in _RUN.finditer(cells, r * width, (r + 1) * width):
+            runs.append((m.group().decode("latin-1"), r, m.start() - r * width, "H"))
+    for c in range(width) if cols is None else cols:
+        for m in _RUN.finditer(cells[c::width]):
+            runs.append((m.group().decode("latin-1"), m.start(), c, "V"))
+    return runs
+
+
+def _crossing_cells(grid, runs):
+    """Cells covered by both a horizontal and a vertical run."""
+    across = bytearray(len(grid.cells))
+    down = bytearray(len(grid.cells))
+    for text, row, col, direction in runs:
+        target = down if direction == "V" else across
+        target[grid.span(row, col, direction, len(text))] = b"\x01" * len(text)
+    return bin(int.from_bytes(across, "big") & int.from_bytes(down, "big")).count("1")
+
+
+def check_layout(grid, placed):
+    """
+    Validate and score a finished layout.
+
+    A layout is valid when every letter run in the grid is a placed word at its
+    place, and every placed word is a run of its own (not part of a longer one).
+
+    Args:
+        grid (Grid | list[list[str]]): The grid
+        placed (list[tuple]): (word, row, col, direction)
+
+    Returns:
+        dict: valid, stray_runs (runs that aren't placed words), hidden_words
+        (placed words swallowed by a longer run), words, crossings (cells shared
+        by an across and a down word), crossings_per_word and density
+    """
+    if not isinstance(grid, Grid):
+        grid = Grid.from_rows(grid)
+    runs = letter_runs(grid)
+    run_set = {tuple(run) for run in runs}
+    placed_set = {tuple(p) for p in placed}
+    stray = [run[0] for run in runs if run not in placed_set]
+    # one-letter words aren't runs, so they can't be checked this way
+    hidden = [p[0] for p in placed if len(p[0]) > 1 and tuple(p) not in run_set]
+    crossings = _crossing_cells(grid, runs)
+    cells = grid.rows * grid.cols
+    return {
+        "valid": not stray and not hidden,
+        "stray_runs": stray,
+        "hidden_words": hidden,
+        "words": len(placed),
+        "crossings": crossings,
+        "crossings_per_word": round(crossings / len(placed), 3) if placed else 0.0,
+        "density": round(grid.filled() / cells, 4) if cells else 0.0,
+    }
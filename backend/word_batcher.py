@@ -0,0 +1,198 @@
+"""
+Micro-batching of theme word requests to an OpenAI-compatible chat endpoint.
+
+Requests arriving within `window_ms` of each other (up to `max_batch`) go out as
+one chat completion whose prompt lists every theme and whose answer is a JSON
+object with one entry per request id. Entries that are missing or unusable are
+put back in the queue on their own, so one bad theme doesn't cost the others a
+second call. All calls share one keep-alive HTTP connection pool.
+
+Point OPENAI_BASE_URL at mock_llm_server.py to run it without the real API.
+"""
+import asyncio
+import json
+
+LANGUAGES = {"nl": "Dutch", "en": "English", "de": "German", "fr": "French"}
+
+
+def build_prompt(requests):
+    """Prompt for a batch of (id, theme, num_words, language) requests."""
+    listed = [
+        {"id": i, "theme": theme, "language": LANGUAGES.get(language, language), "count": num_words}
+        for i, theme, num_words, language in requests
+    ]
+    return (
+        "In order to help me build crossword puzzles, generate simple words for each request below: "
+        "`count` words in the given language, related to the theme, each with a short clue in that language. "
+        'Return only a JSON object {"results": [{"id": <request id>, "words": [{"word": ..., "clue": ...}]}]} '
+        "with one entry per request.\n"
+        f"Requests: {json.dumps(listed, ensure_ascii=False)}"
+    )
+
+
+def parse_results(content):
+    """
+    Split a batch answer into per-request word lists.
+
+    Returns:
+        dict: request id -> (words, clues) for every entry that has at least one
+        usable word; malformed entries are left out
+    """
+    try:
+        results = json.loads(content)["results"]
+    except (ValueError, KeyError, TypeError):
+        return {}
+    parsed = {}
+    for entry in results if isinstance(results, list) else []:
+        if not isinstance(entry, dict) or not isinstance(entry.get("words"), list):
+            continue
+        clues = {}
+        for item in entry["words"]:
+            if not isinstance(item, dict) or not isinstance(item.get("word"), str):
+                continue
+            word = item["word"].strip().upper()
+            if word:
+                clues[word] = {"clue": str(item.get("clue", "")), "word": word}
+        if clues:
+            try:
+                parsed[int(entry.get("id"))] = (list(clues), clues)
+            except (TypeError, ValueError):
+                continue
+    return parsed
+
+
+class _Pending:
+    __slots__ = ("theme", "num_words", "language", "future", "attempts")
+
+    def __init__(self, theme, num_words, language, future):
+        self.theme = theme
+        self.num_words = num_words
+        self.language = language
+        self.future = future
+        self.attempts = 0
+
+
+class WordBatcher:
+    """
+    Collects theme requests for a few milliseconds and sends them as one call.
+
+    fetch() must be awaited on the event loop; the client is created on first use
+    (so importing needs neither the SDK nor an API key) and again if a different
+    loop calls in.
+    """
+
+    def __init__(self, model="gpt-4o-mini", window_ms=10, max_batch=8, max_attempts=3, max_connections=8,
+                 timeout=60.0, base_url=None, api_key=None, temperature=0.7):
+        """
+        Args:
+            model (str): Chat model
+            window_ms (float): How long the first request of a batch waits for company
+            max_batch (int): Requests per call; a full batch is sent at once
+            max_attempts (int): Calls a request may take part in before it fails
+            max_connections (int): Size of the keep-alive connection pool
+            timeout (float): Seconds per call
+            base_url (str | None): OpenAI-compatible endpoint (default: OPENAI_BASE_URL or the OpenAI API)
+            api_key (str | None): Key for the endpoint (default: OPENAI_API_KEY)
+            temperature (float): Sampling temperature
+        """
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.max_attempts = max(1, max_attempts)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.base_url = base_url
+        self.api_key = api_key
+        self.temperature = temperature
+        self.stats = {"calls": 0, "requests": 0, "retried": 0, "failed": 0}
+        self._client = None
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        self._sending = set()
+
+    def _get_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            import httpx
+            from openai import AsyncOpenAI
+
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60,
+                ),
+                timeout=self.timeout,
+            )
+            self._client = AsyncOpenAI(base_url=self.base_url, api_key=self.api_key, http_client=http_client)
+            self._loop = loop
+        return self._client
+
+    async def fetch(self, theme, num_words=10, language="nl"):
+        """
+        Words and clues for one theme, sent along with whatever else is queued.
+
+        Returns:
+            words (list[str]), result (dict)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue([_Pending(theme, num_words, language, future)])
+        return await future
+
+    def _queue(self, items):
+        self._pending.extend(items)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch):
+        self.stats["calls"] += 1
+        self.stats["requests"] += len(batch)
+        error = None
+        try:
+            response = await self._get_client().chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": build_prompt(
+                    (i, item.theme, item.num_words, item.language) for i, item in enumerate(batch)
+                )}],
+                temperature=self.temperature,
+                response_format={"type": "json_object"},
+            )
+            results = parse_results(response.choices[0].message.content or "")
+        except Exception as e:
+            error, results = e, {}
+
+        retry = []
+        for i, item in enumerate(batch):
+            if item.future.done():  # the caller went away
+                continue
+            if i in results:
+                item.future.set_result(results[i])
+                continue
+            item.attempts += 1
+            if item.attempts < self.max_attempts:
+                retry.append(item)
+            else:
+                self.stats["failed"] += 1
+                item.future.set_exception(error or ValueError(f"no usable words for theme {item.theme!r}"))
+        if retry:
+            self.stats["retried"] += len(retry)
+            self._queue(retry)
+
+    async def aclose(self):
+        """Close the connection pool (if it belongs to the running loop)."""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.close()
+        self._client = None
@@ -0,0 +1,176 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_theme(theme):
+    """Case- and whitespace-insensitive form of a theme, used as the cache key."""
+    return " ".join(theme.casefold().split())
+
+
+class WordCache:
+    """
+    Two-tier cache for theme -> (words, clues) lookups.
+
+    - An in-process LRU holds the hottest keys.
+    - An SQLite file keeps results across restarts.
+
+    Each key (normalized theme, num_words, language) holds up to `variants` distinct
+    word lists. Until that many have been collected a lookup counts as a miss, so the
+    caller asks the LLM again and the puzzles for a popular theme don't all repeat.
+    Once full, lookups rotate through the stored variants.
+    """
+
+    def __init__(self, path=None, max_memory_keys=256, max_disk_rows=10000, ttl=7 * 24 * 3600, variants=3):
+        """
+        Args:
+            path (str | None): SQLite file, or None for a memory-only cache
+            max_memory_keys (int): Keys kept in the in-process LRU
+            max_disk_rows (int): Variants kept on disk before the least recently used are evicted
+            ttl (float): Seconds before a variant expires
+            variants (int): Variants collected per key before lookups start hitting
+        """
+        self.path = path
+        self.max_memory_keys = max_memory_keys
+        self.max_disk_rows = max_disk_rows
+        self.ttl = ttl
+        self.variants = max(1, variants)
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "stores": 0, "evictions": 0}
+
+        self._memory = OrderedDict()  # key -> {"items": [(created_at, words, clues)], "next": int}
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS theme_words ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " theme TEXT NOT NULL, num_words INTEGER NOT NULL, language TEXT NOT NULL,"
+                " payload TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS theme_words_key ON theme_words (theme, num_words, language)"
+            )
+            self._db.commit()
+
+    def _key(self, theme, num_words, language):
+        return normalize_theme(theme), int(num_words), language
+
+    def _live(self, items, now):
+        return [item for item in items if now - item[0] < self.ttl]
+
+    def _load_from_disk(self, key, now):
+        if self._db is None:
+            return []
+        rows = self._db.execute(
+            "SELECT created_at, payload FROM theme_words"
+            " WHERE theme = ? AND num_words = ? AND language = ? AND created_at > ?"
+            " ORDER BY created_at",
+            (*key, now - self.ttl),
+        ).fetchall()
+        items = []
+        for created_at, payload in rows:
+            data = json.loads(payload)
+            items.append((created_at, data["words"], data["clues"]))
+        if rows:
+            self._db.execute(
+                "UPDATE theme_words SET last_used = ? WHERE theme = ? AND num_words = ? AND language = ?",
+                (now, *key),
+            )
+            self._db.commit()
+        return items
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_keys:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, theme, num_words=10, language="nl"):
+        """
+        Look up a cached variant.
+
+        Returns:
+            (words, clues) or None on a miss
+        """
+        key = self._key(theme, num_words, language)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            tier = "memory_hits"
+            if entry is not None:
+                entry["items"] = self._live(entry["items"], now)
+            if entry is None or len(entry["items"]) < self.variants:
+                items = self._load_from_disk(key, now)
+                if entry is None or len(items) > len(entry["items"]):
+                    entry = {"items": items, "next": entry["next"] if entry else 0}
+                    tier = "disk_hits"
+                self._remember(key, entry)
+            else:
+                self._memory.move_to_end(key)
+
+            if len(entry["items"]) < self.variants:
+                self.stats["misses"] += 1
+                return None
+
+            index = entry["next"] % len(entry["items"])
+            entry["next"] = index + 1
+            self.stats["hits"] += 1
+            self.stats[tier] += 1
+            _, words, clues = entry["items"][index]
+            return list(words), json.loads(json.dumps(clues))
+
+    def put(self, theme, num_words, language, words, clues):
+        """Store one more variant for a key, evicting the oldest when it is full."""
+        key = self._key(theme, num_words, language)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key) or {"items": [], "next": 0}
+            items = self._live(entry["items"], now)
+            items.append((now, list(words), clues))
+            entry["items"] = items[-self.variants:]
+            self._remember(key, entry)
+            self.stats["stores"] += 1
+
+            if self._db is not None:
+                payload = json.dumps({"words": list(words), "clues": clues}, ensure_ascii=False)
+                self._db.execute(
+                    "INSERT INTO theme_words (theme, num_words, language, payload, created_at, last_used)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (*key, payload, now, now),
+                )
+                self._evict_disk(key, now)
+                self._db.commit()
+
+    def _evict_disk(self, key, now):
+        db = self._db
+        removed = db.execute("DELETE FROM theme_words WHERE created_at <= ?", (now - self.ttl,)).rowcount
+        # keep only the newest `variants` rows of this key
+        removed += db.execute(
+            "DELETE FROM theme_words WHERE theme = ? AND num_words = ? AND language = ? AND id NOT IN ("
+            " SELECT id FROM theme_words WHERE theme = ? AND num_words = ? AND language = ?"
+            " ORDER BY created_at DESC LIMIT ?)",
+            (*key, *key, self.variants),
+        ).rowcount
+        (count,) = db.execute("SELECT COUNT(*) FROM theme_words").fetchone()
+        if count > self.max_disk_rows:
+            removed += db.execute(
+                "DELETE FROM theme_words WHERE id IN ("
+                " SELECT id FROM theme_words ORDER BY last_used, created_at LIMIT ?)",
+                (count - self.max_disk_rows,),
+            ).rowcount
+        self.stats["evictions"] += removed
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM theme_words")
+                self._db.commit()
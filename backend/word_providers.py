@@ -0,0 +1,245 @@
+"""
+Where theme words and clues come from.
+
+A provider turns (theme, num_words, language) into (words, clues). WORD_PROVIDER
+picks the one ai_word_generator uses:
+
+    openai              OpenAI chat API (OPENAI_API_KEY), micro-batched (word_batcher.py)
+    openai-compatible   any OpenAI-compatible endpoint at LLM_BASE_URL (Ollama, vLLM,
+                        llama.cpp, mock_llm_server.py); LLM_API_KEY is optional
+    lexicon             words from the local lexicon, offline and deterministic per theme
+    fixture             fixed words from a JSON file (WORD_FIXTURES), for tests
+
+Providers are built on first use and open no connection until their first
+request, so importing this module costs nothing and needs no API key.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from word_batcher import LANGUAGES, WordBatcher
+from word_cache import normalize_theme
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fixture_words.json")
+
+
+def _result(items):
+    """(words, clues) from [{"word", "clue"}], words upper-cased and deduplicated in order."""
+    clues = {}
+    for item in items:
+        word = item["word"].strip().upper()
+        if word:
+            clues[word] = {"clue": item.get("clue", ""), "word": word}
+    return list(clues), clues
+
+
+class WordProvider:
+    """
+    Base class. Subclasses implement get_words(); the async variant calls it
+    directly, which suits providers that answer from memory.
+    """
+
+    name = None
+    # Worth keeping in word_cache: slow or paid answers, which may differ per call
+    cacheable = False
+
+    def get_words(self, theme, num_words=10, language="nl"):
+        """
+        Returns:
+            words (list[str]), clues (dict word -> {"word", "clue"})
+        """
+        raise NotImplementedError
+
+    async def get_words_async(self, theme, num_words=10, language="nl"):
+        return self.get_words(theme, num_words, language)
+
+    async def aclose(self):
+        pass
+
+
+class OpenAIProvider(WordProvider):
+    """
+    Chat-completion words. Async requests go through a WordBatcher (unless
+    batch_window_ms is 0); sync ones, and async ones without batching, use a
+    blocking client on a bounded thread pool. Both clients are created lazily.
+    """
+
+    name = "openai"
+    cacheable = True
+
+    def __init__(self, model="gpt-4o-mini", base_url=None, api_key=None, temperature=0.7, max_concurrency=8,
+                 batch_window_ms=10, batch_size=8, batch_attempts=3):
+        """
+        Args:
+            model (str): Chat model
+            base_url (str | None): Endpoint (default: OPENAI_BASE_URL or the OpenAI API)
+            api_key (str | None): Key (default: OPENAI_API_KEY)
+            temperature (float): Sampling temperature
+            max_concurrency (int): Calls in flight: thread pool size and connection pool size
+            batch_window_ms (float): Micro-batching window; 0 sends one call per theme
+            batch_size (int): Themes per batched call
+            batch_attempts (int): Batched calls a theme may take part in before it fails
+        """
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.temperature = temperature
+        self.batcher = WordBatcher(
+            model=model, window_ms=batch_window_ms, max_batch=batch_size, max_attempts=batch_attempts,
+            max_connections=max_concurrency, base_url=base_url, api_key=api_key, temperature=temperature,
+        ) if batch_window_ms > 0 else None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+
+                self._client = OpenAI(base_url=self.base_url, api_key=self.api_key)
+            return self._client
+
+    def get_words(self, theme, num_words=10, language="nl"):
+        prompt = (
+            f"In order to help me build a crossword puzzle, generate {num_words} simple "
+            f"{LANGUAGES.get(language, language)} words related to the theme '{theme}'. Return only a plain json "
+            "array (no line breaks, nothing besides the values asked) with words and a short clue (in "
+            f"{LANGUAGES.get(language, language)}) for them, the keys used in each object should be 'word' and 'clue'."
+        )
+        response = self._get_client().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+        )
+        return _result(json.loads(response.choices[0].message.content.strip()))
+
+    async def get_words_async(self, theme, num_words=10, language="nl"):
+        if self.batcher is not None:
+            return await self.batcher.fetch(theme, num_words, language)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.get_words, theme, num_words, language)
+
+    async def aclose(self):
+        if self.batcher is not None:
+            await self.batcher.aclose()
+
+
+class OpenAICompatibleProvider(OpenAIProvider):
+    """OpenAIProvider for a self-hosted endpoint, which usually takes any API key."""
+
+    name = "openai-compatible"
+
+    def __init__(self, base_url, model, api_key=None, **kwargs):
+        super().__init__(model=model, base_url=base_url, api_key=api_key or "none", **kwargs)
+
+
+class LexiconProvider(WordProvider):
+    """
+    Words from the local lexicon: those whose word or clue shares a word with the
+    theme first, the rest drawn at random with the theme as seed, so a theme
+    always gets the same list.
+    """
+
+    name = "lexicon"
+
+    def __init__(self, lexicon=None, min_length=3, max_length=10):
+        self._lexicon = lexicon
+        self.min_length = min_length
+        self.max_length = max_length
+
+    @property
+    def lexicon(self):
+        if self._lexicon is None:
+            from lexicon import get_lexicon
+
+            self._lexicon = get_lexicon()
+        return self._lexicon
+
+    def get_words(self, theme, num_words=10, language="nl"):
+        lexicon = self.lexicon
+        pool = sorted(
+            word for length, group in lexicon.by_length.items()
+            if self.min_length <= length <= self.max_length for word in group
+        )
+        rng = random.Random(normalize_theme(theme))
+        rng.shuffle(pool)
+        terms = set(re.findall(r"\w+", normalize_theme(theme)))
+        related = [w for w in pool if terms & set(re.findall(r"\w+", f"{w} {lexicon.clue(w) or ''}".casefold()))]
+        chosen = related[:num_words]
+        if len(chosen) < num_words:
+            taken = set(chosen)
+            chosen += [w for w in pool if w not in taken][:num_words - len(chosen)]
+        return _result({"word": w, "clue": lexicon.clue(w) or ""} for w in chosen)
+
+
+class FixtureProvider(WordProvider):
+    """
+    Fixed words per theme from a JSON file {"<theme>": [{"word", "clue"}], "*": [...]};
+    "*" answers every theme not listed.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path=DEFAULT_FIXTURES):
+        self.path = path
+        self._fixtures = None
+
+    def get_words(self, theme, num_words=10, language="nl"):
+        if self._fixtures is None:
+            with open(self.path, encoding="utf-8") as f:
+                self._fixtures = {
+                    key if key == "*" else normalize_theme(key): items for key, items in json.load(f).items()
+                }
+        items = self._fixtures.get(normalize_theme(theme), self._fixtures.get("*", []))
+        return _result(items[:num_words])
+
+
+def provider_from_env(name=None):
+    """A new provider, configured from the environment (see the module docstring)."""
+    name = name or os.getenv("WORD_PROVIDER", "openai")
+    llm_options = {
+        "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        "batch_window_ms": float(os.getenv("LLM_BATCH_WINDOW_MS", "10")),
+        "batch_size": int(os.getenv("LLM_BATCH_SIZE", "8")),
+        "batch_attempts": int(os.getenv("LLM_BATCH_ATTEMPTS", "3")),
+    }
+    if name == "openai":
+        return OpenAIProvider(model=os.getenv("LLM_MODEL", "gpt-4o-mini"), **llm_options)
+    if name == "openai-compatible":
+        if not os.getenv("LLM_BASE_URL"):
+            raise ValueError("WORD_PROVIDER=openai-compatible needs LLM_BASE_URL")
+        return OpenAICompatibleProvider(
+            os.environ["LLM_BASE_URL"], os.getenv("LLM_MODEL", "llama3.1"), api_key=os.getenv("LLM_API_KEY"),
+            **llm_options,
+        )
+    if name == "lexicon":
+        return LexiconProvider()
+    if name == "fixture":
+        return FixtureProvider(os.getenv("WORD_FIXTURES", DEFAULT_FIXTURES))
+    raise ValueError(f"unknown WORD_PROVIDER {name!r}")
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name=None):
+    """
+    The shared provider with this name (default: WORD_PROVIDER), built on first use.
+    """
+    name = name or os.getenv("WORD_PROVIDER", "openai")
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = provider_from_env(name)
+        return _providers[name]
+
+
+def current_provider(name=None):
+    """The shared provider if get_provider() has built it, else None; never builds one."""
+    with _providers_lock:
+        return _providers.get(name or os.getenv("WORD_PROVIDER", "openai"))